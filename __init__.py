@@ -1,18 +1,21 @@
 """The Flora Planner integration."""
 import asyncio
+import dataclasses
 import logging
 from datetime import timedelta, datetime, date
 import random
-import json
+from types import MappingProxyType
 import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import Event, HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
 import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_track_state_change_event, async_track_time_change
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
 from homeassistant.components import persistent_notification
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
@@ -20,18 +23,196 @@ from .const import (
     CONF_WEATHER_ENTITY,
     CONF_ZONE_NAME,
     CONF_PLANTS,
-    CONF_SOIL_MOISTURE_ENTITY,
+    CONF_PLANT_NAME,
+    CONF_ANCHOR_DATE,
+    CONF_WATER_INTERVAL,
+    CONF_FEED_INTERVAL,
+    CONF_WATER_START_MONTH,
+    CONF_WATER_END_MONTH,
+    CONF_FEED_START_MONTH,
+    CONF_FEED_END_MONTH,
+    CONF_PRUNE_MONTH,
+    CONF_SOW_MONTH,
+    CONF_HARVEST_MONTH,
+    CONF_MIN_MOISTURE,
+    CONF_DROUGHT_ONLY,
     SOIL_MOISTURE_THRESHOLD,
     PRECIP_THRESHOLD,
     TEMP_THRESHOLD,
     COLD_THRESHOLD,
     CONF_GEMINI_API_KEY,
-    ATTR_WEEKLY_STORY,
+    EVENT_WATER,
     CONF_AUTO_WATER,
+    REFRESH_COOLDOWN,
+    DAY_CHANGE_SPREAD,
+    CONF_AI_REQUESTS_PER_MINUTE,
+    CONF_AI_REQUESTS_PER_DAY,
+    DEFAULT_AI_REQUESTS_PER_MINUTE,
+    DEFAULT_AI_REQUESTS_PER_DAY,
+    DEFAULT_AI_CONCURRENCY,
+    BATCH_MIN_PLANTS,
+    EVENT_FEED,
+    EVENT_PRUNE,
+    EVENT_SOW,
+    EVENT_HARVEST,
+    PLAN_HORIZON_DAYS,
+    REASON_SCHEDULE,
+    REASON_SOIL_MOISTURE,
+    REASON_HEAT,
 )
+from .batch import PlantBatch
+from .instrumentation import RefreshStats, RefreshTimer
+from .metrics import async_get_metrics, async_register_metrics_view
+from .refresh_scheduler import async_get_refresh_scheduler, zone_jitter
+from .models import PlantStatus, ZoneData
+from .schedule import CompiledPlant, ScheduledTask, compile_plants, first_task, iter_tasks
+from .story_cache import StoryCache, async_get_story_cache
+from .runtime_state import ZoneRuntimeState
+from .weather_hub import WeatherSnapshot, async_get_weather_hub
+from .gemini import GeminiQuotaError, async_get_gemini_client
+from .gemini_budget import PRIORITY_BACKGROUND, async_get_gemini_budget
+from .profiles import PROFILE_BATCH_SIZE, async_get_plant_profile, async_get_plant_profiles, plant_slug
 
 _LOGGER = logging.getLogger(__name__)
 
+_MONTH = vol.All(vol.Coerce(int), vol.Range(min=1, max=12))
+_OPTIONAL_MONTH = vol.All(vol.Coerce(int), vol.Range(min=0, max=12))  # 0 = niet van toepassing
+_INTERVAL = vol.All(vol.Coerce(int), vol.Range(min=1, max=365))
+
+# Velden van een plant bij add_plant en add_plants, met de grenzen uit services.yaml
+PLANT_FIELDS = {
+    vol.Optional(CONF_WATER_INTERVAL, default=7): _INTERVAL,
+    vol.Optional(CONF_FEED_INTERVAL, default=30): _INTERVAL,
+    vol.Optional(CONF_WATER_START_MONTH, default=1): _MONTH,
+    vol.Optional(CONF_WATER_END_MONTH, default=12): _MONTH,
+    vol.Optional(CONF_FEED_START_MONTH, default=3): _MONTH,
+    vol.Optional(CONF_FEED_END_MONTH, default=10): _MONTH,
+    vol.Optional(CONF_PRUNE_MONTH, default=1): _OPTIONAL_MONTH,
+    vol.Optional(CONF_SOW_MONTH, default=0): _OPTIONAL_MONTH,
+    vol.Optional(CONF_HARVEST_MONTH, default=0): _OPTIONAL_MONTH,
+    vol.Optional(CONF_MIN_MOISTURE, default=20): vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
+    vol.Optional(CONF_DROUGHT_ONLY, default=False): cv.boolean,
+    vol.Optional(CONF_AUTO_WATER, default=True): cv.boolean,
+}
+
+PLANT_SCHEMA = vol.Schema({vol.Required(CONF_PLANT_NAME): cv.string, **PLANT_FIELDS})
+
+
+def _plant_item(value) -> dict:
+    """Validate one plant of add_plants: a plant name or a dict with plant fields."""
+    if isinstance(value, str):
+        value = {CONF_PLANT_NAME: value}
+    return PLANT_SCHEMA(value)
+
+
+ADD_PLANT_SCHEMA = vol.Schema({
+    vol.Optional("zone_name"): cv.string,
+    vol.Required(CONF_PLANT_NAME): cv.string,
+    vol.Optional("use_ai", default=False): cv.boolean,
+    **PLANT_FIELDS,
+})
+
+ADD_PLANTS_SCHEMA = vol.Schema({
+    vol.Optional("zone_name"): cv.string,
+    vol.Required("plants"): vol.All(cv.ensure_list, [_plant_item]),
+    vol.Optional("use_ai", default=False): cv.boolean,
+    vol.Optional("max_concurrency", default=DEFAULT_AI_CONCURRENCY): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=20)
+    ),
+    vol.Optional("batch_size", default=PROFILE_BATCH_SIZE): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=50)
+    ),
+})
+
+GET_AI_ADVICE_SCHEMA = vol.All(
+    vol.Schema({
+        vol.Exclusive("plant_name", "plants"): cv.string,
+        vol.Exclusive("plant_names", "plants"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("batch_size", default=PROFILE_BATCH_SIZE): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=50)
+        ),
+        # Wordt niet meer gebruikt, maar bestaande scripts sturen hem nog mee
+        vol.Optional("zone_name"): cv.string,
+    }),
+    cv.has_at_least_one_key("plant_name", "plant_names"),
+)
+
+
+def _find_zone_entry(hass: HomeAssistant, zone_name: str | None) -> ConfigEntry | None:
+    """Find the config entry of a zone; without a name only if there is exactly one."""
+    entries = hass.config_entries.async_entries(DOMAIN)
+    if zone_name:
+        return next((ent for ent in entries if ent.data.get(CONF_ZONE_NAME) == zone_name), None)
+    if len(entries) == 1:
+        return entries[0]
+    return None
+
+
+def zone_setting(entry: ConfigEntry, key: str, default):
+    """Return a zone setting: from the options flow, else from the zone setup, else the default."""
+    if key in entry.options:
+        return entry.options[key]
+    return entry.data.get(key, default)
+
+
+def _build_plant_data(data: dict) -> dict:
+    """Build the stored plant dict from service data validated by PLANT_FIELDS."""
+    return {
+        CONF_PLANT_NAME: data[CONF_PLANT_NAME],
+        CONF_ANCHOR_DATE: dt_util.now().date().isoformat(),
+        CONF_WATER_INTERVAL: data[CONF_WATER_INTERVAL],
+        CONF_FEED_INTERVAL: data[CONF_FEED_INTERVAL],
+        CONF_WATER_START_MONTH: data[CONF_WATER_START_MONTH],
+        CONF_WATER_END_MONTH: data[CONF_WATER_END_MONTH],
+        CONF_FEED_START_MONTH: data[CONF_FEED_START_MONTH],
+        CONF_FEED_END_MONTH: data[CONF_FEED_END_MONTH],
+        # Jaarlijkse maanden worden als tekst opgeslagen, net als in de config flow
+        CONF_PRUNE_MONTH: str(data[CONF_PRUNE_MONTH]),
+        CONF_SOW_MONTH: str(data[CONF_SOW_MONTH]),
+        CONF_HARVEST_MONTH: str(data[CONF_HARVEST_MONTH]),
+        CONF_MIN_MOISTURE: data[CONF_MIN_MOISTURE],
+        CONF_DROUGHT_ONLY: data[CONF_DROUGHT_ONLY],
+        CONF_AUTO_WATER: data[CONF_AUTO_WATER],
+    }
+
+
+def _advice_response(profile: dict | Exception) -> dict:
+    """Build the get_ai_advice response for a profile, or defaults on failure."""
+    if isinstance(profile, Exception):
+        _LOGGER.error(f"AI advies mislukt: {profile}")
+        return {
+            "watering_interval": 7, 
+            "min_moisture": 20, 
+            "drought_tolerant": False,
+            "water_start_month": 1,
+            "water_end_month": 12,
+            "feed_start_month": 3,
+            "feed_end_month": 10,
+            "feeding_interval": 30, 
+            "pruning_month": 1, 
+            "sowing_month": 0, 
+            "harvesting_month": 0,
+            "advice": f"Kon geen advies ophalen (Fout: {str(profile)}). Controleer je API key en internetverbinding."
+        }
+    if "advice" not in profile:
+        profile["advice"] = "Geen specifiek advies ontvangen van AI."
+    return profile
+
+
+def _apply_profile(plant_data: dict, profile: dict) -> None:
+    """Copy the values of a (sanitized) AI plant profile into plant_data."""
+    plant_data[CONF_WATER_INTERVAL] = profile["watering_interval"]
+    plant_data[CONF_FEED_INTERVAL] = profile["feeding_interval"]
+    plant_data[CONF_WATER_START_MONTH] = profile["water_start_month"]
+    plant_data[CONF_WATER_END_MONTH] = profile["water_end_month"]
+    plant_data[CONF_FEED_START_MONTH] = profile["feed_start_month"]
+    plant_data[CONF_FEED_END_MONTH] = profile["feed_end_month"]
+    plant_data[CONF_PRUNE_MONTH] = str(profile["pruning_month"])
+    plant_data[CONF_SOW_MONTH] = str(profile["sowing_month"])
+    plant_data[CONF_HARVEST_MONTH] = str(profile["harvesting_month"])
+    plant_data[CONF_MIN_MOISTURE] = profile["min_moisture"]
+    plant_data[CONF_DROUGHT_ONLY] = profile["drought_tolerant"]
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Flora Planner from a config entry."""
@@ -52,53 +233,27 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             use_ai = call.data.get("use_ai", False)
             
             # Zoek de juiste config entry
-            entry_to_update = None
-            entries = hass.config_entries.async_entries(DOMAIN)
-
-            if zone_name:
-                for ent in entries:
-                    if ent.data.get(CONF_ZONE_NAME) == zone_name:
-                        entry_to_update = ent
-                        break
-                if not entry_to_update:
+            entry_to_update = _find_zone_entry(hass, zone_name)
+            if entry_to_update is None:
+                if zone_name:
                     _LOGGER.error(f"Geen Flora Planner zone gevonden met naam: {zone_name}")
-                    return
-            elif len(entries) == 1:
-                entry_to_update = entries[0]
-            else:
-                _LOGGER.error("Geen zone opgegeven en er zijn meerdere (of geen) Flora Planner configuraties.")
+                else:
+                    _LOGGER.error("Geen zone opgegeven en er zijn meerdere (of geen) Flora Planner configuraties.")
                 return
 
+            existing = {plant_slug(plant[CONF_PLANT_NAME]) for plant in entry_to_update.options.get(CONF_PLANTS, [])}
+            if plant_slug(plant_name) in existing:
+                raise HomeAssistantError(f"Plant '{plant_name}' bestaat al in {entry_to_update.data.get(CONF_ZONE_NAME)}")
+
             # Standaard waarden
-            plant_data = {
-                "plant_name": plant_name,
-                "anchor_date": date.today().isoformat(),
-                "watering_interval": call.data.get("watering_interval", 7),
-                "feeding_interval": call.data.get("feeding_interval", 30),
-                "pruning_month": str(call.data.get("pruning_month", 1)),
-                "sowing_month": str(call.data.get("sowing_month", 0)),
-                "harvesting_month": str(call.data.get("harvesting_month", 0)),
-                "min_moisture": int(call.data.get("min_moisture", 20)),
-                "drought_only": bool(call.data.get("drought_only", False)),
-                "auto_water": bool(call.data.get("auto_water", True)),
-            }
+            plant_data = _build_plant_data(call.data)
 
-            # Als AI aanstaat (via de oude methode), probeer gegevens op te halen
+            # Als AI aanstaat, probeer gegevens op te halen
             if use_ai:
                 api_key = entry_to_update.data.get(CONF_GEMINI_API_KEY)
                 if api_key:
                     try:
-                        prompt = f"Voor de plant '{plant_name}', geef JSON met 'watering_interval' (dagen), 'drought_tolerant' (boolean, true als plant alleen water nodig heeft bij hitte/droogte), 'feeding_interval' (dagen), 'pruning_month' (1-12), 'sowing_month' (1-12, 0 als nvt), 'harvesting_month' (1-12, 0 als nvt)."
-                        text = await _call_gemini_api(hass, api_key, prompt)
-                        clean_text = text.strip().replace("```json", "").replace("```", "")
-                        ai_data = json.loads(clean_text)
-                        
-                        # Simpele overname van waarden (sanity checks zitten in de config flow / script logica)
-                        if ai_data.get("watering_interval"): plant_data["watering_interval"] = ai_data["watering_interval"]
-                        if ai_data.get("feeding_interval"): plant_data["feeding_interval"] = ai_data["feeding_interval"]
-                        if ai_data.get("pruning_month"): plant_data["pruning_month"] = str(ai_data["pruning_month"])
-                        if ai_data.get("drought_tolerant") is not None: plant_data["drought_only"] = ai_data["drought_tolerant"]
-
+                        _apply_profile(plant_data, await async_get_plant_profile(hass, api_key, plant_name))
                     except Exception as e:
                         _LOGGER.warning(f"AI service call mislukt voor {plant_name}: {e}")
                         persistent_notification.async_create(hass, f"AI mislukt voor {plant_name}, standaardwaarden gebruikt.", "Flora Planner")
@@ -113,13 +268,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             )
             persistent_notification.async_create(hass, f"Plant '{plant_name}' succesvol toegevoegd aan {zone_name or 'je zone'}!", "Flora Planner")
 
-    hass.services.async_register(DOMAIN, "add_plant", async_handle_add_plant)
+    hass.services.async_register(DOMAIN, "add_plant", async_handle_add_plant, schema=ADD_PLANT_SCHEMA)
 
     # 2. Service: AI Advies Ophalen
     async def async_handle_get_ai_advice(call: ServiceCall) -> dict:
             """Haal advies op van AI en geef het terug (voor in scripts)."""
             plant_name = call.data.get("plant_name")
-            zone_name = call.data.get("zone_name", "")
             api_key = None
             
             # Zoek een API key in de configuraties
@@ -131,162 +285,138 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             if not api_key:
                 raise Exception("Geen API key gevonden in Flora Planner configuratie.")
 
-            try:
-                prompt = (
-                    f"Voor de plant '{plant_name}' (locatie: {zone_name}), geef een JSON-object met: "
-                    f"'watering_interval' (dagen), 'drought_tolerant' (boolean, true als plant alleen water nodig heeft bij hitte/droogte), 'min_moisture' (0-100), 'feeding_interval' (dagen), "
-                    f"'water_start_month' (1-12), 'water_end_month' (1-12), 'feed_start_month' (1-12), 'feed_end_month' (1-12), "
-                    f"'pruning_month' (1-12), 'sowing_month' (1-12, 0 als nvt), 'harvesting_month' (1-12, 0 als nvt), "
-                    f"en 'advice' (een duidelijke uitleg in het Nederlands over: waterbehoefte, "
-                    f"waarom deze vochtigheid, signalen van te veel/weinig water, en specifieke momenten voor extra voeding). "
-                    f"Geef alleen de JSON string terug zonder markdown opmaak."
+            # Batch modus: meerdere planten in één AI verzoek
+            if (plant_names := call.data.get("plant_names")) is not None:
+                profiles = await async_get_plant_profiles(
+                    hass, api_key, plant_names, batch_size=call.data["batch_size"]
                 )
-                
-                text = await _call_gemini_api(hass, api_key, prompt)
-                clean_text = text.strip().replace("```json", "").replace("```", "")
-                data = json.loads(clean_text)
-                
-                if "advice" not in data:
-                    data["advice"] = "Geen specifiek advies ontvangen van AI."
-                
-                return data
+                return {"plants": {name: _advice_response(result) for name, result in profiles.items()}}
 
+            try:
+                # Profielen worden gedeeld tussen zones (en gecached), dus zonder locatie
+                data = await async_get_plant_profile(hass, api_key, plant_name)
             except Exception as e:
-                _LOGGER.error(f"AI advies mislukt: {e}")
-                return {
-                    "watering_interval": 7, 
-                    "min_moisture": 20, 
-                    "drought_tolerant": False,
-                    "water_start_month": 1,
-                    "water_end_month": 12,
-                    "feed_start_month": 3,
-                    "feed_end_month": 10,
-                    "feeding_interval": 30, 
-                    "pruning_month": 1, 
-                    "sowing_month": 0, 
-                    "harvesting_month": 0,
-                    "advice": f"Kon geen advies ophalen (Fout: {str(e)}). Controleer je API key en internetverbinding."
-                }
-
-    hass.services.async_register(DOMAIN, "get_ai_advice", async_handle_get_ai_advice, supports_response=SupportsResponse.ONLY)
+                data = e
+            return _advice_response(data)
+
+    hass.services.async_register(
+        DOMAIN,
+        "get_ai_advice",
+        async_handle_get_ai_advice,
+        schema=GET_AI_ADVICE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    # 3. Service: Meerdere Planten Toevoegen
+    async def async_handle_add_plants(call: ServiceCall) -> ServiceResponse:
+            """Add a list of plants with one options write."""
+            zone_name = call.data.get("zone_name")
+            use_ai = call.data["use_ai"]
+            entry_to_update = _find_zone_entry(hass, zone_name)
+            if entry_to_update is None:
+                raise HomeAssistantError(f"Geen (unieke) Flora Planner zone gevonden voor: {zone_name or 'standaard zone'}")
+
+            api_key = entry_to_update.data.get(CONF_GEMINI_API_KEY)
+            # Namen met dezelfde slug zouden dezelfde entiteit-ID's krijgen
+            existing = {plant_slug(plant[CONF_PLANT_NAME]) for plant in entry_to_update.options.get(CONF_PLANTS, [])}
+
+            prepared: list[tuple[dict | None, dict]] = []
+            for item in call.data["plants"]:
+                plant_name = item[CONF_PLANT_NAME]
+                result = {"plant_name": plant_name, "status": "added", "ai": "off"}
+                if plant_slug(plant_name) in existing:
+                    result.update(status="skipped", message="Plant bestaat al in deze zone")
+                    prepared.append((None, result))
+                    continue
+                existing.add(plant_slug(plant_name))
+                prepared.append((_build_plant_data(item), result))
+
+            if use_ai and api_key:
+                # AI profielen in batches, met een begrensd aantal verzoeken tegelijk
+                profiles = await async_get_plant_profiles(
+                    hass,
+                    api_key,
+                    [plant_data[CONF_PLANT_NAME] for plant_data, _ in prepared if plant_data is not None],
+                    batch_size=call.data["batch_size"],
+                    semaphore=asyncio.Semaphore(call.data["max_concurrency"]),
+                )
+                for plant_data, result in prepared:
+                    if plant_data is None:
+                        continue
+                    profile = profiles.get(plant_data[CONF_PLANT_NAME])
+                    if isinstance(profile, dict):
+                        _apply_profile(plant_data, profile)
+                        result["ai"] = "used"
+                    else:
+                        _LOGGER.warning(f"AI service call mislukt voor {plant_data[CONF_PLANT_NAME]}: {profile}")
+                        result.update(ai="failed", message=str(profile))
+
+            new_plants = [plant_data for plant_data, _ in prepared if plant_data is not None]
+            if new_plants:
+                hass.config_entries.async_update_entry(
+                    entry_to_update,
+                    options={
+                        **entry_to_update.options,
+                        CONF_PLANTS: [*entry_to_update.options.get(CONF_PLANTS, []), *new_plants],
+                    },
+                )
 
-    # --- EINDE SERVICE REGISTRATIE ---
+            results = [result for _, result in prepared]
+            persistent_notification.async_create(
+                hass,
+                f"{len(new_plants)} van {len(results)} planten toegevoegd aan {entry_to_update.data.get(CONF_ZONE_NAME)}.",
+                "Flora Planner",
+            )
+            return {
+                "zone_name": entry_to_update.data.get(CONF_ZONE_NAME),
+                "added": len(new_plants),
+                "results": results,
+            }
 
-    coordinator = FloraPlannerCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
+    hass.services.async_register(
+        DOMAIN,
+        "add_plants",
+        async_handle_add_plants,
+        schema=ADD_PLANTS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
 
-    hass.data[DOMAIN][entry.entry_id] = coordinator
-    
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    # --- EINDE SERVICE REGISTRATIE ---
 
-    # Registreer de service om planten toe te voegen (alleen als hij nog niet bestaat)
-    if not hass.services.has_service(DOMAIN, "add_plant"):
-        async def async_handle_add_plant(call: ServiceCall):
-            """Handle the service call to add a plant."""
-            zone_name = call.data.get("zone_name")
-            plant_name = call.data.get("plant_name")
-            use_ai = call.data.get("use_ai", False)
-            
-            # Zoek de juiste config entry
-            entry_to_update = None
-            entries = hass.config_entries.async_entries(DOMAIN)
-
-            if zone_name:
-                # Als gebruiker specifiek een zone noemt, zoek die
-                for ent in entries:
-                    if ent.data.get(CONF_ZONE_NAME) == zone_name:
-                        entry_to_update = ent
-                        break
-                if not entry_to_update:
-                    _LOGGER.error(f"Geen Flora Planner zone gevonden met naam: {zone_name}")
-                    return
-            elif len(entries) == 1:
-                # Geen zone opgegeven, maar er is er maar één? Gebruik die!
-                entry_to_update = entries[0]
-            else:
-                _LOGGER.error("Geen zone opgegeven en er zijn meerdere (of geen) Flora Planner configuraties.")
-                return
+    async_register_metrics_view(hass)
 
-            # Standaard waarden
-            plant_data = {
-                "plant_name": plant_name,
-                "anchor_date": date.today().isoformat(),
-                "watering_interval": call.data.get("watering_interval", 7),
-                "feeding_interval": call.data.get("feeding_interval", 30),
-                "water_start_month": int(call.data.get("water_start_month", 1)),
-                "water_end_month": int(call.data.get("water_end_month", 12)),
-                "feed_start_month": int(call.data.get("feed_start_month", 3)),
-                "feed_end_month": int(call.data.get("feed_end_month", 10)),
-                "pruning_month": str(call.data.get("pruning_month", 1)),
-                "sowing_month": str(call.data.get("sowing_month", 0)),
-                "harvesting_month": str(call.data.get("harvesting_month", 0)),
-                "min_moisture": int(call.data.get("min_moisture", 20)),
-            }
+    # Alle zones delen één Gemini budget; de strengste limieten gelden
+    entry.async_on_unload(
+        async_get_gemini_budget(hass).async_set_limits(
+            entry.entry_id,
+            zone_setting(entry, CONF_AI_REQUESTS_PER_MINUTE, DEFAULT_AI_REQUESTS_PER_MINUTE),
+            zone_setting(entry, CONF_AI_REQUESTS_PER_DAY, DEFAULT_AI_REQUESTS_PER_DAY),
+        )
+    )
 
-            # Als AI aanstaat, probeer gegevens op te halen
-            if use_ai:
-                api_key = entry_to_update.data.get(CONF_GEMINI_API_KEY)
-                if api_key:
-                    try:
-                        session = async_get_clientsession(hass)
-                        prompt = f"Voor de plant '{plant_name}', geef JSON met 'watering_interval' (dagen), 'feeding_interval' (dagen), 'pruning_month' (1-12), 'sowing_month' (1-12, 0 als nvt), 'harvesting_month' (1-12, 0 als nvt)."
-                        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={api_key}"
-                        payload = {"contents": [{"parts": [{"text": prompt}]}]}
-                        
-                        async with session.post(url, json=payload) as response:
-                            if response.status == 200:
-                                result = await response.json()
-                                text = result["candidates"][0]["content"]["parts"][0]["text"]
-                                clean_text = text.strip().replace("```json", "").replace("```", "")
-                                ai_data = json.loads(clean_text)
-                                
-                                # --- Sanity Check ---
-                                # Water: Tussen 1 en 60 dagen
-                                ai_water = ai_data.get("watering_interval")
-                                if isinstance(ai_water, int) and 1 <= ai_water <= 60:
-                                    plant_data["watering_interval"] = ai_water
-
-                                # Voeding: Tussen 1 en 365 dagen
-                                ai_feed = ai_data.get("feeding_interval")
-                                if isinstance(ai_feed, int) and 1 <= ai_feed <= 365:
-                                    plant_data["feeding_interval"] = ai_feed
-
-                                # Snoeien: 1 t/m 12
-                                ai_prune = str(ai_data.get("pruning_month"))
-                                if ai_prune in ["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12"]:
-                                    plant_data["pruning_month"] = ai_prune
-
-                                # Zaaien & Oogsten
-                                ai_sow = str(ai_data.get("sowing_month"))
-                                if ai_sow in [str(i) for i in range(13)]:
-                                    plant_data["sowing_month"] = ai_sow
-                                
-                                ai_harvest = str(ai_data.get("harvesting_month"))
-                                if ai_harvest in [str(i) for i in range(13)]:
-                                    plant_data["harvesting_month"] = ai_harvest
+    story_cache = await async_get_story_cache(hass)
+    runtime_state = ZoneRuntimeState(hass, entry.entry_id)
+    await runtime_state.async_load()
 
-                    except Exception as e:
-                        _LOGGER.warning(f"AI service call mislukt voor {plant_name}: {e}")
-                        persistent_notification.async_create(hass, f"AI mislukt voor {plant_name}, standaardwaarden gebruikt.", "Flora Planner")
+    coordinator = FloraPlannerCoordinator(hass, entry, story_cache, runtime_state)
+    await coordinator.async_config_entry_first_refresh()
 
-            # Update de configuratie
-            current_plants = list(entry_to_update.options.get(CONF_PLANTS, []))
-            current_plants.append(plant_data)
-            
-            hass.config_entries.async_update_entry(
-                entry_to_update, 
-                options={**entry_to_update.options, CONF_PLANTS: current_plants}
-            )
-            persistent_notification.async_create(hass, f"Plant '{plant_name}' succesvol toegevoegd aan {zone_name or 'je zone'}!", "Flora Planner")
+    hass.data[DOMAIN][entry.entry_id] = coordinator
+    
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-        hass.services.async_register(DOMAIN, "add_plant", async_handle_add_plant)
+    coordinator.async_start_listeners()
+    entry.async_on_unload(coordinator.async_stop_listeners)
+    
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
     return True
 
-async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload config entry."""
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply config entry changes, reloading only when they can't be applied in place."""
+    coordinator: FloraPlannerCoordinator | None = hass.data[DOMAIN].get(entry.entry_id)
+    if coordinator is not None and await coordinator.async_apply_entry_update():
+        return
     await hass.config_entries.async_reload(entry.entry_id)
 
 
@@ -299,172 +429,490 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
-class FloraPlannerCoordinator(DataUpdateCoordinator):
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Clean up the runtime state of a removed zone."""
+    await ZoneRuntimeState(hass, entry.entry_id).async_remove()
+
+
+# Taken uit het plan zoals ze in de prompt voor het weekverhaal komen
+WEEKLY_TASK_LABELS = {
+    "nl": {
+        EVENT_WATER: "geef {} water",
+        EVENT_FEED: "geef {} voeding",
+        EVENT_PRUNE: "snoei {}",
+        EVENT_SOW: "zaai {}",
+        EVENT_HARVEST: "oogst {}",
+    },
+    "en": {
+        EVENT_WATER: "water {}",
+        EVENT_FEED: "feed {}",
+        EVENT_PRUNE: "prune {}",
+        EVENT_SOW: "sow {}",
+        EVENT_HARVEST: "harvest {}",
+    },
+}
+
+
+NO_STORY = "Nog geen verhaal voor deze week."
+
+
+class FloraPlannerCoordinator(DataUpdateCoordinator[ZoneData]):
     """Data update coordinator for the Flora Planner integration."""
 
-    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        story_cache: StoryCache,
+        runtime_state: ZoneRuntimeState,
+    ):
         """Initialize the coordinator."""
         self.hass = hass
         self.config_entry = config_entry
+        self.story_cache = story_cache
+        self.runtime_state = runtime_state
         self.zone_name = self.config_entry.data[CONF_ZONE_NAME]
         self.weather_entity = self.config_entry.data[CONF_WEATHER_ENTITY]
+
+        # Momentopname van de entry, zodat we wijzigingen kunnen vergelijken
+        self._entry_data = dict(self.config_entry.data)
+        self._entry_options = self._snapshot_options()
+        # Gecompileerde planten; wordt opnieuw opgebouwd als de opties wijzigen
+        self.plants: tuple[CompiledPlant, ...] = compile_plants(
+            self._entry_options.get(CONF_PLANTS, []), self.runtime_state.anchors
+        )
+        # Verhoogd bij elke wijziging van planten of ankerdata, zodat de
+        # kalender weet wanneer zijn gecachte events verouderd zijn
+        self.schedule_version = 0
         
+        self._unsub_listeners: list = []
+        # Temperatuur en neerslag van de laatste berekening
+        self._last_weather: tuple[float | None, float | None] | None = None
+        # Parallelle arrays voor zones met heel veel planten, zie batch.py
+        self._batch: PlantBatch | None = None
+        self._batch_version = -1
+        # Duur per fase en uitkomst van de laatste refreshes, voor de diagnostiek
+        self.stats = RefreshStats()
+        self._metrics = async_get_metrics(hass)
+        self._refresh_scheduler = async_get_refresh_scheduler(hass)
+        # Het weekverhaal wordt op de achtergrond gemaakt; tot die tijd geldt het vorige
+        self._weekly_story = NO_STORY
+        self._story_tasks: list[str] | None = None
+        self._story_task: asyncio.Task | None = None
+
+        # We reageren op wijzigingen van weer en bodemsensoren; de periodieke
+        # vangnet refresh plant de gedeelde scheduler, verspreid over de zones.
+        # De debouncer voegt snelle wijzigingen samen.
         super().__init__(
             hass,
             _LOGGER,
             name=f"{DOMAIN}_{self.zone_name}",
-            update_interval=timedelta(hours=1),
+            update_interval=None,
+            # Alleen entiteiten bijwerken als het resultaat echt veranderd is
+            always_update=False,
+            request_refresh_debouncer=Debouncer(
+                hass, _LOGGER, cooldown=REFRESH_COOLDOWN, immediate=False
+            ),
         )
 
-    async def _async_update_data(self):
-        """Fetch data and calculate needs."""
-        weather_state = self.hass.states.get(self.weather_entity)
-        if weather_state is None:
-            raise UpdateFailed(f"Weather entity {self.weather_entity} not found")
+    @callback
+    def async_start_listeners(self) -> None:
+        """Re-evaluate the zone as soon as one of its inputs changes."""
+        self.async_stop_listeners()
+
+        soil_entities = {plant.soil_entity for plant in self.plants if plant.soil_entity}
+        # Elke zone begint de dag op een eigen, vaste seconde
+        day_offset = 5 + int(zone_jitter(self.config_entry.entry_id) * (DAY_CHANGE_SPREAD.total_seconds() - 5))
+        self._unsub_listeners = [
+            # Het weer komt via de gedeelde hub van deze weer-entiteit
+            async_get_weather_hub(self.hass, self.weather_entity).async_add_listener(
+                self._async_weather_updated
+            ),
+            # Nieuwe dag, nieuwe taken
+            async_track_time_change(
+                self.hass, self._async_day_changed, hour=0, minute=day_offset // 60, second=day_offset % 60
+            ),
+            # Vangnet refresh in het eigen slot van deze zone
+            self._refresh_scheduler.async_register(self.config_entry.entry_id, self.async_refresh),
+        ]
+        if soil_entities:
+            self._unsub_listeners.append(
+                async_track_state_change_event(
+                    self.hass, list(soil_entities), self._async_soil_changed
+                )
+            )
+
+    @callback
+    def async_stop_listeners(self) -> None:
+        """Stop listening for input changes."""
+        while self._unsub_listeners:
+            self._unsub_listeners.pop()()
+
+    @callback
+    def _async_weather_updated(self, snapshot: WeatherSnapshot) -> None:
+        """Refresh when temperature or precipitation changed."""
+        if (snapshot.temperature, snapshot.precipitation) == self._last_weather:
+            return
+        self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def _async_soil_changed(self, event: Event) -> None:
+        """Refresh when a soil moisture reading changed."""
+        old_state = event.data.get("old_state")
+        new_state = event.data.get("new_state")
+        if old_state is not None and new_state is not None and old_state.state == new_state.state:
+            return
+        self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def _async_day_changed(self, now: datetime) -> None:
+        """Refresh at the start of a new day."""
+        self.hass.async_create_task(self.async_request_refresh())
+
+    async def async_apply_entry_update(self) -> bool:
+        """Apply changed config entry options without a reload.
+
+        Returns False if the change can only be applied by reloading the entry.
+        """
+        options = self._snapshot_options()
+        old_raw = {plant[CONF_PLANT_NAME]: plant for plant in self._entry_options.get(CONF_PLANTS, [])}
+        new_raw = options.get(CONF_PLANTS, [])
+        # Ankers en laatst gesproeid horen bij de plant zoals hij was ingesteld: bij een
+        # gewijzigde of verwijderde plant vervallen ze, zodat de ingestelde ankerdatum weer
+        # geldt. Ook vóór een herlaadactie, want die leest de opslag opnieuw.
+        await self.runtime_state.async_prune(
+            plant[CONF_PLANT_NAME] for plant in new_raw if old_raw.get(plant[CONF_PLANT_NAME]) == plant
+        )
 
-        # Haal temperatuur en regen op uit de weer-entiteit
-        temp = weather_state.attributes.get("temperature")
-        # Let op: bij sommige weer-entiteiten heet dit anders, pas eventueel aan naar jouw specifieke sensor
-        precip = weather_state.attributes.get("precipitation", 0) 
+        if dict(self.config_entry.data) != self._entry_data:
+            return False
+
+        changed = {
+            key
+            for key in options.keys() | self._entry_options.keys()
+            if options.get(key) != self._entry_options.get(key)
+        }
+        if not changed:
+            return True
+        if changed != {CONF_PLANTS}:
+            return False
+
+        # Alleen de planten zijn gewijzigd: hergebruik ongewijzigde planten
+        old_compiled = {plant.name: plant for plant in self.plants}
+        anchors = self.runtime_state.anchors
+        self.plants = tuple(
+            old_compiled[plant[CONF_PLANT_NAME]]
+            if old_raw.get(plant[CONF_PLANT_NAME]) == plant
+            else CompiledPlant(plant, anchors.get(plant[CONF_PLANT_NAME]))
+            for plant in new_raw
+        )
+        self._entry_options = options
+        self.schedule_version += 1
+        # Mogelijk andere bodemsensoren
+        self.async_start_listeners()
+
+        _LOGGER.debug(f"Planten van zone {self.zone_name} bijgewerkt zonder herladen")
+        await self.async_request_refresh()
+        # Een gelijk resultaat meldt de coordinator niet, maar de plantgegevens in de
+        # attributen kunnen wel gewijzigd zijn
+        self.async_update_listeners()
+        return True
+
+    def _snapshot_options(self) -> dict:
+        """Copy the entry options, including the plant list itself."""
+        options = dict(self.config_entry.options)
+        options[CONF_PLANTS] = list(options.get(CONF_PLANTS, []))
+        return options
+
+    async def _async_update_data(self):
+        """Fetch data and calculate needs, a limited number of zones at a time."""
+        async with self._refresh_scheduler.slots:
+            return await self._async_evaluate_zone()
+
+    async def _async_evaluate_zone(self) -> ZoneData:
+        """Evaluate the watering needs and plan of the zone."""
+        timer = RefreshTimer()
+        # Het weer wordt per weer-entiteit één keer opgehaald en gedeeld met alle zones
+        weather = await async_get_weather_hub(self.hass, self.weather_entity).async_get_snapshot()
+        timer.lap("weather")
+        if weather is None:
+            err = UpdateFailed(f"Weather entity {self.weather_entity} not found")
+            self._async_record_refresh(timer, err)
+            raise err
+
+        temp = weather.temperature
+        precip = weather.precipitation
+        self._last_weather = (temp, precip)
 
         try:
-            zone_data = {
-                "watering_required": False,
-                "plant_watering_status": {},
-                ATTR_WEEKLY_STORY: "Nog geen verhaal voor deze week."
-            }
-            plants = self.config_entry.options.get(CONF_PLANTS, [])
-            today = date.today()
-
-            # Variabele om bij te houden of we de configuratie moeten opslaan
-            config_changed = False
-            new_options = dict(self.config_entry.options)
-            plants_copy = list(new_options.get(CONF_PLANTS, []))
-
-            for i, plant in enumerate(plants):
-                plant_name = plant["plant_name"]
-                is_due = False
-
-                # --- 1. Bodemsensor Override (De nieuwe AI code) ---
-                soil_entity = plant.get(CONF_SOIL_MOISTURE_ENTITY)
-                if soil_entity:
-                    soil_state = self.hass.states.get(soil_entity)
-                    if soil_state and soil_state.state not in ["unknown", "unavailable"]:
-                        try:
-                            moisture_level = float(soil_state.state)
-                            if moisture_level < SOIL_MOISTURE_THRESHOLD:
-                                is_due = True
-                                _LOGGER.debug(f"Bodemvocht voor {plant_name} is laag ({moisture_level}%), sproeien vereist.")
-                        except (ValueError, TypeError):
-                            _LOGGER.warning(f"Kon bodemsensor '{soil_state.state}' niet lezen voor {soil_entity}")
-
-                # --- 2. Kalender & Weer Logica (Alleen als bodemsensor niet al 'True' was) ---
-                if not is_due:
-                    base_interval = plant["watering_interval"]
-                    anchor_date_obj = date.fromisoformat(plant["anchor_date"])
-                    dynamic_interval = base_interval
-
-                    # --- Weer Logica ---
-                    if temp is not None:
-                        if temp > TEMP_THRESHOLD:
-                            dynamic_interval = max(1, int(base_interval / 2)) # Hitte: interval halveren
-                        elif temp < COLD_THRESHOLD:
-                            dynamic_interval = base_interval * 2 # Kou: interval verdubbelen
-
-                    days_since_anchor = (today - anchor_date_obj).days
-                    is_due = (days_since_anchor % dynamic_interval) == 0 and days_since_anchor >= 0
-
-                    # --- ONZE REGEN FIX ---
-                    if precip is not None and precip > PRECIP_THRESHOLD:
-                        is_due = False # De natuur heeft gesproeid!
-                        
-                        # Reset de datum naar vandaag zodat hij morgen weer op dag 1 begint
-                        if anchor_date_obj != today:
-                            p_copy = dict(plants_copy[i])
-                            p_copy["anchor_date"] = today.isoformat()
-                            plants_copy[i] = p_copy
-                            config_changed = True
-
-                # --- 3. Resultaat verwerken ---
-                if is_due:
-                    zone_data["watering_required"] = True
-                
-                zone_data["plant_watering_status"][plant_name] = is_due
+            # De dag in de tijdzone van Home Assistant, net als de kalender
+            today = dt_util.now().date()
+
+            if len(self.plants) >= BATCH_MIN_PLANTS:
+                watering_required, plant_status = self._evaluate_plants_batched(today, temp, precip)
+            else:
+                watering_required, plant_status = self._evaluate_plants(today, temp, precip)
             
-            # Sla de nieuwe datums op in de database als het geregend heeft
-            if config_changed:
-                new_options[CONF_PLANTS] = plants_copy
-                self.hass.config_entries.async_update_entry(self.config_entry, options=new_options)
+            timer.lap("soil_evaluation")
 
-            # --- 4. Wekelijkse Verhaal Generatie (De nieuwe AI code) ---
-            weekly_tasks = await self._calculate_weekly_tasks(plants)
-            if weekly_tasks:
-                story = await self._generate_story(weekly_tasks)
-                zone_data[ATTR_WEEKLY_STORY] = story
+            # Eén plan voor de komende dagen; verhaal, kalender en attributen lezen hieruit
+            plan = self._build_plan(today, plant_status)
+            timer.lap("plan")
 
-            return zone_data
+            # --- 4. Wekelijkse Verhaal Generatie (De nieuwe AI code) ---
+            # Niet afwachten: het sproeien hangt nooit van Gemini af
+            self._async_update_story(self._plan_task_labels(plan), today)
+
+            self._async_record_refresh(timer)
+            return ZoneData(
+                day=today,
+                watering_required=watering_required,
+                plants=MappingProxyType(plant_status),
+                plan=plan,
+                weekly_story=self._weekly_story,
+            )
 
         except Exception as err:
+            self._async_record_refresh(timer, err)
             raise UpdateFailed(f"Error processing data: {err}") from err
 
-    async def _calculate_weekly_tasks(self, plants: list) -> list[str]:
-        """Calculate all tasks for the next 7 days."""
-        tasks = set()
-        today = date.today()
-        language = self.hass.config.language
-        
-        def is_in_season(month, start, end):
-            if start <= end:
-                return start <= month <= end
-            else: # Loopt door over jaarwisseling (bijv. Nov-Feb)
-                return month >= start or month <= end
-
-        for i in range(7):
-            current_date = today + timedelta(days=i)
+    @callback
+    def _async_record_refresh(self, timer: RefreshTimer, error: Exception | None = None) -> None:
+        """Feed a finished refresh to the diagnostics and the metrics."""
+        self.stats.async_record(timer, len(self.plants), error)
+        self._metrics.async_observe_refresh(self.zone_name, timer.total / 1000)
+        self._metrics.async_set_plant_count(self.zone_name, len(self.plants))
+
+    def _evaluate_plants(
+        self, today: date, temp: float | None, precip: float | None
+    ) -> tuple[bool, dict[str, PlantStatus]]:
+        """Determine per plant whether it needs water today."""
+        watering_required = False
+        plant_status: dict[str, PlantStatus] = {}
+        today_ordinal = today.toordinal()
+        anchors_moved = False
+
+        for plant in self.plants:
+            plant_name = plant.name
+            is_due = False
+            moisture_level = None
+
+            # --- 1. Bodemsensor Override (De nieuwe AI code) ---
+            soil_entity = plant.soil_entity
+            if soil_entity:
+                soil_state = self.hass.states.get(soil_entity)
+                if soil_state and soil_state.state not in ["unknown", "unavailable"]:
+                    try:
+                        moisture_level = float(soil_state.state)
+                        if moisture_level < SOIL_MOISTURE_THRESHOLD:
+                            is_due = True
+                            _LOGGER.debug(f"Bodemvocht voor {plant_name} is laag ({moisture_level}%), sproeien vereist.")
+                    except (ValueError, TypeError):
+                        _LOGGER.warning(f"Kon bodemsensor '{soil_state.state}' niet lezen voor {soil_entity}")
+
+            # --- 2. Kalender & Weer Logica (Alleen als bodemsensor niet al 'True' was) ---
+            if not is_due:
+                base_interval = plant.water_interval
+                dynamic_interval = base_interval
+
+                # --- Weer Logica ---
+                if temp is not None:
+                    if temp > TEMP_THRESHOLD:
+                        dynamic_interval = max(1, int(base_interval / 2)) # Hitte: interval halveren
+                    elif temp < COLD_THRESHOLD:
+                        dynamic_interval = base_interval * 2 # Kou: interval verdubbelen
+
+                days_since_anchor = today_ordinal - plant.anchor_ordinal
+                # Zonder geldig interval geen sproeibeurten, net als in schedule.interval_dates
+                is_due = base_interval >= 1 and days_since_anchor >= 0 and days_since_anchor % dynamic_interval == 0
+
+                # --- ONZE REGEN FIX ---
+                if precip is not None and precip > PRECIP_THRESHOLD:
+                    is_due = False # De natuur heeft gesproeid!
+                    
+                    # Reset de datum naar vandaag zodat hij morgen weer op dag 1 begint.
+                    # Dit gaat naar de runtime opslag, niet naar de opties (dat herlaadt alles).
+                    if plant.anchor_ordinal != today_ordinal:
+                        plant.set_anchor(today)
+                        self.runtime_state.async_set_anchor(plant_name, today)
+                        anchors_moved = True
+
+            # --- 3. Resultaat verwerken ---
+            if is_due:
+                watering_required = True
             
-            for plant in plants:
-                plant_name = plant["plant_name"]
-                anchor = date.fromisoformat(plant["anchor_date"])
-                days_since_anchor = (current_date - anchor).days
-
-                if days_since_anchor < 0:
+            next_watering = today
+            if not is_due:
+                task = first_task((plant,), today + timedelta(days=1), EVENT_WATER)
+                next_watering = task.day if task else None
+            plant_status[plant_name] = PlantStatus(is_due, next_watering, moisture_level)
+
+        if anchors_moved:
+            # Eén nieuwe versie per evaluatie, net als _evaluate_plants_batched
+            self.schedule_version += 1
+
+        return watering_required, plant_status
+
+    def _evaluate_plants_batched(
+        self, today: date, temp: float | None, precip: float | None
+    ) -> tuple[bool, dict[str, PlantStatus]]:
+        """Same as _evaluate_plants, in one pass over parallel arrays."""
+        batch = self._get_batch()
+        today_ordinal = today.toordinal()
+
+        # Alleen de bodemsensoren lezen we nog per plant
+        soil_due = [False] * len(batch)
+        moisture: dict[int, float] = {}
+        for index, soil_entity in batch.soil_entities:
+            soil_state = self.hass.states.get(soil_entity)
+            if soil_state and soil_state.state not in ["unknown", "unavailable"]:
+                try:
+                    moisture[index] = float(soil_state.state)
+                except (ValueError, TypeError):
+                    _LOGGER.warning(f"Kon bodemsensor '{soil_state.state}' niet lezen voor {soil_entity}")
                     continue
+                if moisture[index] < SOIL_MOISTURE_THRESHOLD:
+                    soil_due[index] = True
+
+        due, reset, next_ordinals = batch.evaluate_watering(today_ordinal, temp, precip, soil_due)
+
+        if reset:
+            # De batch heeft de ankers al verzet; nu de planten en de opslag
+            for index in reset:
+                self.plants[index].set_anchor(today)
+                self.runtime_state.async_set_anchor(batch.names[index], today)
+            self.schedule_version += 1
+            self._batch_version = self.schedule_version
+
+        plant_status: dict[str, PlantStatus] = {}
+        for index, (name, is_due, next_ordinal) in enumerate(zip(batch.names, due, next_ordinals)):
+            next_watering = date.fromordinal(next_ordinal) if next_ordinal is not None else None
+            if next_watering is not None and not is_due and not self.plants[index].water_season[next_watering.month]:
+                # Buiten het seizoen; de batch rekent alleen met het interval
+                task = first_task((self.plants[index],), next_watering, EVENT_WATER)
+                next_watering = task.day if task else None
+            plant_status[name] = PlantStatus(is_due, next_watering, moisture.get(index))
+        return any(due), plant_status
+
+    def _get_batch(self) -> PlantBatch:
+        """Return the arrays of the current plants, rebuilding them after schedule changes."""
+        if self._batch is None or self._batch_version != self.schedule_version:
+            self._batch = PlantBatch(self.plants)
+            self._batch_version = self.schedule_version
+        return self._batch
+
+    def _build_plan(self, today: date, plant_status: dict[str, PlantStatus]) -> tuple[ScheduledTask, ...]:
+        """Plan the tasks of the next PLAN_HORIZON_DAYS days, in time order.
+
+        The days come from the schedule, except for today's watering: that
+        is what the evaluation of today decided, so rain and dry soil are
+        taken into account.
+        """
+        end = today + timedelta(days=PLAN_HORIZON_DAYS - 1)
+        if len(self.plants) >= BATCH_MIN_PLANTS:
+            batch = self._get_batch()
+            days = [
+                (day.toordinal(), day.month, day.day)
+                for day in (today + timedelta(days=i) for i in range(PLAN_HORIZON_DAYS))
+            ]
+            scheduled = (
+                ScheduledTask(date.fromordinal(ordinal), kind, batch.names[index])
+                for ordinal, kind, index in batch.iter_tasks(days)
+            )
+        else:
+            scheduled = iter_tasks(self.plants, today, end)
+
+        plan = [task for task in scheduled if task.day != today or task.kind != EVENT_WATER]
+        today_ordinal = today.toordinal()
+        for plant in self.plants:
+            status = plant_status.get(plant.name)
+            if status is None or not status.due:
+                continue
+            if status.moisture is not None and status.moisture < SOIL_MOISTURE_THRESHOLD:
+                reason = REASON_SOIL_MOISTURE
+            elif (today_ordinal - plant.anchor_ordinal) % plant.water_interval == 0:
+                reason = REASON_SCHEDULE
+            else:
+                # Alleen door het gehalveerde interval aan de beurt
+                reason = REASON_HEAT
+            plan.append(ScheduledTask(today, EVENT_WATER, plant.name, reason))
+        plan.sort()
+        return tuple(plan)
+
+    def _plan_task_labels(self, plan: tuple[ScheduledTask, ...]) -> list[str]:
+        """Describe the planned tasks for the story prompt, once per plant and kind."""
+        labels = WEEKLY_TASK_LABELS["nl" if self.hass.config.language == "nl" else "en"]
+        return list(dict.fromkeys(labels[task.kind].format(task.plant) for task in plan))
+
+    @callback
+    def _async_update_story(self, tasks: list[str], today: date) -> None:
+        """Start generating a new story in the background if the tasks changed."""
+        if tasks == self._story_tasks:
+            return
+        self._story_tasks = tasks
+        if self._story_task is not None:
+            # Verhaal voor verouderde taken
+            self._story_task.cancel()
+            self._story_task = None
+        if not tasks:
+            self._weekly_story = NO_STORY
+            return
+        self._story_task = self.config_entry.async_create_background_task(
+            self.hass, self._async_refresh_story(tasks, today), f"{DOMAIN}_{self.zone_name}_story"
+        )
 
-                # Check Water Seizoen
-                water_start = int(plant.get(CONF_WATER_START_MONTH, 1))
-                water_end = int(plant.get(CONF_WATER_END_MONTH, 12))
-                if is_in_season(current_date.month, water_start, water_end) and days_since_anchor % plant["watering_interval"] == 0:
-                    if language == "nl":
-                        tasks.add(f"geef {plant_name} water")
-                    else:
-                        tasks.add(f"water {plant_name}")
-                
-                # Check Voeding Seizoen
-                feed_start = int(plant.get(CONF_FEED_START_MONTH, 3))
-                feed_end = int(plant.get(CONF_FEED_END_MONTH, 10))
-                if is_in_season(current_date.month, feed_start, feed_end) and days_since_anchor % plant["feeding_interval"] == 0:
-                    if language == "nl":
-                        tasks.add(f"geef {plant_name} voeding")
-                    else:
-                        tasks.add(f"feed {plant_name}")
+    async def _async_refresh_story(self, tasks: list[str], today: date) -> None:
+        """Generate the story and push it to the entities once it is ready."""
+        timer = RefreshTimer()
+        try:
+            story, source = await self._generate_story(tasks, today)
+        except asyncio.CancelledError:
+            # Ingehaald door nieuwe taken
+            self.stats.async_record_story(timer, "cancelled")
+            raise
+        except GeminiQuotaError as e:
+            _LOGGER.debug(f"Geen Gemini budget voor het weekverhaal: {e}")
+            # Bij de volgende refresh opnieuw proberen
+            self._story_tasks = None
+            # Liever het vorige verhaal dan een algemene tekst
+            if self._weekly_story != NO_STORY:
+                story = self._weekly_story
+                self.stats.async_record_story(timer, "previous", e)
+            else:
+                story = self._fallback_story()
+                self.stats.async_record_story(timer, "fallback", e)
+        except Exception as e:
+            _LOGGER.warning(f"Could not generate weekly story with Gemini: {e}")
+            self._story_tasks = None
+            story = self._fallback_story()
+            self.stats.async_record_story(timer, "fallback", e)
+        else:
+            self.stats.async_record_story(timer, source)
 
-                prune_month = int(plant["pruning_month"])
-                if current_date.month == prune_month and current_date.day == 1:
-                    if language == "nl":
-                        tasks.add(f"snoei {plant_name}")
-                    else:
-                        tasks.add(f"prune {plant_name}")
-        
-        return list(tasks)
+        self._story_task = None
+        if story == self._weekly_story:
+            return
+        self._weekly_story = story
+        if self.data is not None:
+            self.async_set_updated_data(dataclasses.replace(self.data, weekly_story=story))
 
-    async def _generate_story(self, tasks: list[str]) -> str:
-        """Generate a weekly story using Gemini."""
+    async def _generate_story(self, tasks: list[str], today: date) -> tuple[str, str]:
+        """Generate a weekly story using Gemini; today is the day the tasks were planned.
+
+        Returns the story and where it came from. Gemini errors are raised.
+        """
         language = self.hass.config.language
 
         if not tasks:
             if language == "nl":
-                return "Het is een rustige week in de tuin. Geniet van de stilte!"
-            return "It is a quiet week in the garden. Enjoy the silence!"
+                return "Het is een rustige week in de tuin. Geniet van de stilte!", "quiet"
+            return "It is a quiet week in the garden. Enjoy the silence!", "quiet"
+
+        # Zelfde taken, taal en week? Dan hebben we dit verhaal al.
+        self.story_cache.async_evict_expired(today)
+        cache_key = self.story_cache.make_key(tasks, language, today)
+        if (story := self.story_cache.async_get(cache_key)) is not None:
+            return story, "cache"
 
         task_list = ", ".join(tasks)
         if language == "nl":
@@ -483,23 +931,18 @@ class FloraPlannerCoordinator(DataUpdateCoordinator):
         api_key = self.config_entry.data[CONF_GEMINI_API_KEY]
         if not api_key:
             _LOGGER.error("Geen API key gevonden voor verhaal generatie.")
-            return "Controleer je API key configuratie."
-
-        session = async_get_clientsession(self.hass)
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={api_key}"
-        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+            return "Controleer je API key configuratie.", "no_api_key"
 
-        try:
-            async with session.post(url, json=payload) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    text = result["candidates"][0]["content"]["parts"][0]["text"]
-                    return text.strip().replace('\n', ' ')
-                else:
-                    _LOGGER.error(f"Gemini API error: {response.status}")
-                    raise Exception(f"API returned {response.status}")
-        except Exception as e:
-            _LOGGER.warning(f"Could not generate weekly story with Gemini: {e}")
-            if language == "nl":
-                return "Deze week staan er klusjes op de planning! Kijk op de kalender wat er moet gebeuren."
-            return "There are chores scheduled for this week! Check the calendar to see what needs to be done."
\ No newline at end of file
+        # Achtergrondwerk: is het budget krap, dan gaat interactief gebruik voor
+        text = await async_get_gemini_client(self.hass, api_key).async_generate(
+            prompt, PRIORITY_BACKGROUND
+        )
+        story = text.strip().replace('\n', ' ')
+        self.story_cache.async_set(cache_key, story, today)
+        return story, "gemini"
+
+    def _fallback_story(self) -> str:
+        """Return the general story for when Gemini can't write one."""
+        if self.hass.config.language == "nl":
+            return "Deze week staan er klusjes op de planning! Kijk op de kalender wat er moet gebeuren."
+        return "There are chores scheduled for this week! Check the calendar to see what needs to be done."
\ No newline at end of file
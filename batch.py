@@ -0,0 +1,211 @@
+"""Batched due-date evaluation for zones with very many plants.
+
+The schedule fields of all plants are held in parallel arrays, so the due
+flags of a whole zone are computed in one pass. With NumPy installed that
+pass is vectorized; otherwise the same arithmetic runs over compact
+array-module arrays. Both give exactly the same results as the per-plant
+loops in the coordinator.
+"""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterator, Sequence
+
+from .const import (
+    COLD_THRESHOLD,
+    EVENT_FEED,
+    EVENT_HARVEST,
+    EVENT_PRUNE,
+    EVENT_SOW,
+    EVENT_WATER,
+    PRECIP_THRESHOLD,
+    TEMP_THRESHOLD,
+)
+from .schedule import CompiledPlant
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optioneel
+    np = None
+
+
+def _season_bits(season: tuple[bool, ...]) -> int:
+    """Pack a 13-entry season table into a bitmask, bit n for month n."""
+    return sum(1 << month for month in range(1, 13) if season[month])
+
+
+class PlantBatch:
+    """Parallel arrays of the schedule fields of a zone's plants."""
+
+    def __init__(self, plants: Sequence[CompiledPlant]) -> None:
+        """Copy the fields of the compiled plants into arrays."""
+        self.names = [plant.name for plant in plants]
+        # (index, entiteit) van de planten met een bodemsensor
+        self.soil_entities = [
+            (index, plant.soil_entity) for index, plant in enumerate(plants) if plant.soil_entity
+        ]
+        columns = {
+            "anchor": [plant.anchor_ordinal for plant in plants],
+            "water_interval": [plant.water_interval for plant in plants],
+            "feed_interval": [plant.feed_interval for plant in plants],
+            "water_season": [_season_bits(plant.water_season) for plant in plants],
+            "feed_season": [_season_bits(plant.feed_season) for plant in plants],
+            "prune_month": [plant.prune_month for plant in plants],
+            "sow_month": [plant.sow_month for plant in plants],
+            "harvest_month": [plant.harvest_month for plant in plants],
+        }
+        for name, values in columns.items():
+            setattr(self, name, np.array(values, dtype=np.int64) if np is not None else array("q", values))
+
+    def __len__(self) -> int:
+        """Return the number of plants."""
+        return len(self.names)
+
+    def evaluate_watering(
+        self,
+        today_ordinal: int,
+        temperature: float | None,
+        precipitation: float | None,
+        soil_due: Sequence[bool],
+    ) -> tuple[list[bool], list[int], list[int | None]]:
+        """Compute today's watering status of every plant.
+
+        soil_due flags the plants whose soil sensor is already too dry; those
+        are due regardless of schedule and weather. Returns the due flags, the
+        indices of plants whose anchor moves to today because of rain (the
+        anchors in this batch are already moved) and the ordinal of the next
+        watering of every plant.
+        """
+        rain = precipitation is not None and precipitation > PRECIP_THRESHOLD
+        if np is not None:
+            return self._evaluate_numpy(today_ordinal, temperature, rain, soil_due)
+        return self._evaluate_array(today_ordinal, temperature, rain, soil_due)
+
+    def _evaluate_numpy(
+        self, today_ordinal: int, temperature: float | None, rain: bool, soil_due: Sequence[bool]
+    ) -> tuple[list[bool], list[int], list[int | None]]:
+        """Vectorized evaluate_watering."""
+        soil = np.array(soil_due, dtype=bool)
+        base = self.water_interval
+        interval = base
+        if temperature is not None:
+            if temperature > TEMP_THRESHOLD:
+                interval = np.maximum(1, base // 2)
+            elif temperature < COLD_THRESHOLD:
+                interval = base * 2
+
+        days_since_anchor = today_ordinal - self.anchor
+        # Een interval onder 1 is nooit aan de beurt; np.maximum voorkomt delen door nul
+        due = (base >= 1) & (days_since_anchor >= 0) & (days_since_anchor % np.maximum(interval, 1) == 0)
+        reset: list[int] = []
+        if rain:
+            due[:] = False
+            moved = ~soil & (self.anchor != today_ordinal)
+            reset = np.flatnonzero(moved).tolist()
+            self.anchor[moved] = today_ordinal
+        due |= soil
+
+        # Eerste waterbeurt vanaf morgen, zoals schedule.first_task
+        tomorrow = today_ordinal + 1
+        first = np.maximum(tomorrow, self.anchor)
+        offset = (first - self.anchor) % np.maximum(base, 1)
+        first = first + np.where(offset > 0, base - offset, 0)
+        next_watering = np.where(due, today_ordinal, first)
+        valid = due | (base >= 1)
+        return (
+            due.tolist(),
+            reset,
+            [int(ordinal) if ok else None for ordinal, ok in zip(next_watering.tolist(), valid.tolist())],
+        )
+
+    def _evaluate_array(
+        self, today_ordinal: int, temperature: float | None, rain: bool, soil_due: Sequence[bool]
+    ) -> tuple[list[bool], list[int], list[int | None]]:
+        """evaluate_watering over array-module arrays."""
+        hot = temperature is not None and temperature > TEMP_THRESHOLD
+        cold = temperature is not None and not hot and temperature < COLD_THRESHOLD
+        tomorrow = today_ordinal + 1
+        anchors = self.anchor
+
+        due: list[bool] = []
+        reset: list[int] = []
+        next_watering: list[int | None] = []
+        for index, base in enumerate(self.water_interval):
+            if soil_due[index]:
+                due.append(True)
+                next_watering.append(today_ordinal)
+                continue
+
+            if rain:
+                is_due = False
+                if anchors[index] != today_ordinal:
+                    anchors[index] = today_ordinal
+                    reset.append(index)
+            else:
+                interval = max(1, base // 2) if hot else base * 2 if cold else base
+                days_since_anchor = today_ordinal - anchors[index]
+                is_due = base >= 1 and days_since_anchor >= 0 and days_since_anchor % interval == 0
+            due.append(is_due)
+
+            if is_due:
+                next_watering.append(today_ordinal)
+            elif base < 1:
+                next_watering.append(None)
+            else:
+                first = max(tomorrow, anchors[index])
+                offset = (first - anchors[index]) % base
+                next_watering.append(first + base - offset if offset else first)
+        return due, reset, next_watering
+
+    def iter_tasks(self, days: Sequence[tuple[int, int, int]]) -> Iterator[tuple[int, str, int]]:
+        """Yield (ordinal, kind, plant index) for every task on the given days.
+
+        days holds (ordinal, month, day of month) of every day to check.
+        Matches the rules of schedule.plant_task_streams.
+        """
+        yearly = (
+            (EVENT_PRUNE, self.prune_month),
+            (EVENT_SOW, self.sow_month),
+            (EVENT_HARVEST, self.harvest_month),
+        )
+        for ordinal, month, day in days:
+            if np is not None:
+                days_since_anchor = ordinal - self.anchor
+                started = days_since_anchor >= 0
+                water = (
+                    started
+                    & (self.water_interval >= 1)
+                    & ((self.water_season >> month) & 1 == 1)
+                    & (days_since_anchor % np.maximum(self.water_interval, 1) == 0)
+                )
+                feed = (
+                    started
+                    & (self.feed_interval >= 1)
+                    & ((self.feed_season >> month) & 1 == 1)
+                    & (days_since_anchor % np.maximum(self.feed_interval, 1) == 0)
+                )
+                for index in np.flatnonzero(water).tolist():
+                    yield ordinal, EVENT_WATER, index
+                for index in np.flatnonzero(feed).tolist():
+                    yield ordinal, EVENT_FEED, index
+                if day == 1:
+                    for kind, months in yearly:
+                        for index in np.flatnonzero(started & (months == month)).tolist():
+                            yield ordinal, kind, index
+                continue
+
+            bit = 1 << month
+            for index, anchor in enumerate(self.anchor):
+                days_since_anchor = ordinal - anchor
+                if days_since_anchor < 0:
+                    continue
+                water_interval = self.water_interval[index]
+                if water_interval >= 1 and self.water_season[index] & bit and days_since_anchor % water_interval == 0:
+                    yield ordinal, EVENT_WATER, index
+                feed_interval = self.feed_interval[index]
+                if feed_interval >= 1 and self.feed_season[index] & bit and days_since_anchor % feed_interval == 0:
+                    yield ordinal, EVENT_FEED, index
+                if day == 1:
+                    for kind, months in yearly:
+                        if months[index] == month:
+                            yield ordinal, kind, index
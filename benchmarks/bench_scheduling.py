@@ -0,0 +1,304 @@
+"""Benchmarks for the Flora Planner scheduling hot paths.
+
+Runs offline against a minimal stand-in for hass: the coordinator is set
+up through its own __init__, but the weather hub, the Gemini client, the
+story cache and the runtime state are in-memory stand-ins, so only our own
+code is measured. Home Assistant itself must be installed,
+because the integration modules import it.
+
+Usage (from the repository root):
+
+    python benchmarks/bench_scheduling.py
+    python benchmarks/bench_scheduling.py --sizes 10 100 --repeat 5
+
+For every zone size it reports the best and mean wall time and the peak
+traced memory of:
+
+- FloraPlannerCoordinator._async_update_data (the story is generated in the background)
+- FloraPlannerCoordinator._build_plan
+- FloraPlannerCalendar.async_get_events over 1 month, 1 year and 5 years
+- FloraPlannerSmartWateringSwitch._check_if_water_needed
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timedelta
+import importlib.util
+from pathlib import Path
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from types import ModuleType, SimpleNamespace
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "flora_planner"
+
+DEFAULT_SIZES = (10, 100, 1_000, 10_000)
+CALENDAR_RANGES = {"1 month": 31, "1 year": 365, "5 years": 5 * 365}
+API_KEY = "benchmark"
+
+
+def load_integration() -> ModuleType:
+    """Import the repository as the flora_planner package."""
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE, ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class StubStates:
+    """hass.states with a fixed set of soil sensor readings."""
+
+    def __init__(self, readings: dict[str, str]) -> None:
+        self._states = {
+            entity_id: SimpleNamespace(entity_id=entity_id, state=value, attributes={})
+            for entity_id, value in readings.items()
+        }
+
+    def get(self, entity_id: str) -> Any:
+        return self._states.get(entity_id)
+
+
+class StubBus:
+    """hass.bus that accepts listeners but never fires them."""
+
+    def async_listen_once(self, event_type: str, listener: Callable[..., Any]) -> Callable[[], None]:
+        return lambda: None
+
+
+class StubHass:
+    """Just enough of HomeAssistant to set up a coordinator and run the code paths we benchmark."""
+
+    def __init__(self, readings: dict[str, str]) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.bus = StubBus()
+        self.states = StubStates(readings)
+        self.config = SimpleNamespace(language="nl")
+        self.data: dict[str, Any] = {}
+
+    def async_create_task(self, coro: Awaitable[Any]) -> asyncio.Task:
+        return asyncio.get_running_loop().create_task(coro)
+
+
+class StubWeatherHub:
+    """Weather hub that always returns the same mild, dry weather."""
+
+    def __init__(self, snapshot: Any) -> None:
+        self._snapshot = snapshot
+
+    async def async_get_snapshot(self) -> Any:
+        return self._snapshot
+
+
+class StubGeminiClient:
+    """Gemini client that answers instantly."""
+
+    async def async_generate(self, prompt: str, priority: str = "interactive") -> str:
+        return "Deze week komt de tuin tot leven!\nTijd om de handen uit de mouwen te steken."
+
+
+class StubStoryCache:
+    """Story cache that never hits.
+
+    The coordinator only regenerates the story when the planned tasks change,
+    so within one zone size just the first refresh reaches the (stub) Gemini
+    client.
+    """
+
+    def __init__(self, make_key: Callable[..., str]) -> None:
+        self.make_key = make_key
+
+    def async_evict_expired(self, day: date) -> None:
+        pass
+
+    def async_get(self, key: str) -> str | None:
+        return None
+
+    def async_set(self, key: str, story: str, day: date) -> None:
+        pass
+
+
+class StubRuntimeState:
+    """Runtime state without persistence."""
+
+    def __init__(self) -> None:
+        self.anchors: dict[str, str] = {}
+        self.last_watered: dict[str, str] = {}
+
+    def async_set_anchor(self, plant_name: str, day: date) -> None:
+        self.anchors[plant_name] = day.isoformat()
+
+
+def build_zone(fp: SimpleNamespace, size: int, seed: int = 42) -> tuple[list[dict[str, Any]], dict[str, str]]:
+    """Build the options of a synthetic zone and the readings of its soil sensors."""
+    const = fp.const
+    rng = random.Random(seed)
+    today = date.today()
+    plants = []
+    readings = {}
+    for index in range(size):
+        plant = {
+            const.CONF_PLANT_NAME: f"Plant {index:05d}",
+            const.CONF_ANCHOR_DATE: (today - timedelta(days=rng.randint(0, 400))).isoformat(),
+            const.CONF_WATER_INTERVAL: rng.randint(1, 14),
+            const.CONF_FEED_INTERVAL: rng.randint(7, 60),
+            const.CONF_WATER_START_MONTH: rng.randint(1, 4),
+            const.CONF_WATER_END_MONTH: rng.randint(9, 12),
+            const.CONF_FEED_START_MONTH: 3,
+            const.CONF_FEED_END_MONTH: 10,
+            const.CONF_PRUNE_MONTH: rng.randint(1, 12),
+            const.CONF_SOW_MONTH: rng.choice((0, rng.randint(1, 12))),
+            const.CONF_HARVEST_MONTH: rng.choice((0, rng.randint(1, 12))),
+            const.CONF_MIN_MOISTURE: rng.randint(10, 40),
+            const.CONF_AUTO_WATER: rng.random() < 0.8,
+        }
+        # Ongeveer een derde van de planten heeft een bodemsensor
+        if index % 3 == 0:
+            entity_id = f"sensor.soil_{index:05d}"
+            plant[const.CONF_SOIL_MOISTURE_ENTITY] = entity_id
+            readings[entity_id] = f"{rng.uniform(15, 60):.1f}"
+        plants.append(plant)
+    return plants, readings
+
+
+def build_entities(fp: SimpleNamespace, size: int) -> SimpleNamespace:
+    """Create a coordinator, calendar and switch for a synthetic zone."""
+    const = fp.const
+    plants, readings = build_zone(fp, size)
+    hass = StubHass(readings)
+
+    weather = fp.weather_hub.WeatherSnapshot(temperature=18.0, precipitation=0.0)
+    domain_data = hass.data.setdefault(const.DOMAIN, {})
+    domain_data[const.DATA_WEATHER_HUBS] = {"weather.home": StubWeatherHub(weather)}
+    domain_data[const.DATA_GEMINI_CLIENTS] = {API_KEY: StubGeminiClient()}
+
+    entry = SimpleNamespace(
+        entry_id=f"bench_{size}",
+        title=f"Bench {size}",
+        domain=const.DOMAIN,
+        data={
+            const.CONF_GEMINI_API_KEY: API_KEY,
+            const.CONF_ZONE_NAME: f"Bench {size}",
+            const.CONF_WEATHER_ENTITY: "weather.home",
+            const.CONF_SPRINKLER_ENTITY: "switch.bench",
+        },
+        options={const.CONF_PLANTS: plants},
+        async_on_unload=lambda func: None,
+        async_create_background_task=lambda hass, target, name: hass.async_create_task(target),
+    )
+    # Zoals tijdens async_setup_entry; nieuwere DataUpdateCoordinators lezen hier de entry uit
+    if (current_entry := getattr(fp.config_entries, "current_entry", None)) is not None:
+        current_entry.set(entry)
+
+    coordinator = fp.integration.FloraPlannerCoordinator(
+        hass,
+        entry,
+        StubStoryCache(fp.story_cache.StoryCache.make_key),
+        StubRuntimeState(),
+    )
+
+    calendar = fp.calendar.FloraPlannerCalendar(coordinator, entry)
+    calendar.hass = hass
+    switch = fp.switch.FloraPlannerSmartWateringSwitch(coordinator, entry)
+    switch.hass = hass
+    return SimpleNamespace(coordinator=coordinator, calendar=calendar, switch=switch)
+
+
+async def drain_story(coordinator: Any) -> None:
+    """Wait for the background story task, so it doesn't run during the next measurement."""
+    if (task := coordinator._story_task) is not None:
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def measure(
+    func: Callable[[], Any], repeat: int, settle: Callable[[], Awaitable[None]]
+) -> tuple[float, float, int]:
+    """Return best and mean time in ms and the peak traced memory in bytes.
+
+    tracemalloc slows down every allocation, so the timings come from runs
+    without tracing and the peak memory from one extra traced run. settle
+    runs after every run, outside the measurement.
+    """
+
+    async def call() -> None:
+        result = func()
+        if asyncio.iscoroutine(result):
+            await result
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - start) * 1000)
+        await settle()
+
+    tracemalloc.start()
+    try:
+        await call()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    await settle()
+    return min(timings), statistics.fmean(timings), peak
+
+
+async def run(sizes: list[int], repeat: int) -> None:
+    """Run all benchmarks and print one line per case."""
+    fp = SimpleNamespace(
+        integration=load_integration(),
+        config_entries=importlib.import_module("homeassistant.config_entries"),
+    )
+    for name in ("const", "weather_hub", "story_cache", "calendar", "switch"):
+        setattr(fp, name, importlib.import_module(f"{PACKAGE}.{name}"))
+
+    print(f"{'case':<44} {'plants':>7} {'best ms':>10} {'mean ms':>10} {'peak KiB':>10}")
+    for size in sizes:
+        zone = build_entities(fp, size)
+        coordinator, calendar = zone.coordinator, zone.calendar
+        # Het plan bouwt voort op de evaluatie van vandaag
+        _, plant_status = coordinator._evaluate_plants(date.today(), 18.0, 0.0)
+
+        cases: list[tuple[str, Callable[[], Any]]] = [
+            ("coordinator._async_update_data", coordinator._async_update_data),
+            ("coordinator._build_plan", lambda: coordinator._build_plan(date.today(), plant_status)),
+            ("switch._check_if_water_needed", zone.switch._check_if_water_needed),
+        ]
+        start = datetime.combine(date.today(), datetime.min.time())
+        for label, days in CALENDAR_RANGES.items():
+            end = start + timedelta(days=days)
+
+            async def cold(end: datetime = end) -> None:
+                # Nieuwe versie: de kalender moet alles opnieuw genereren
+                coordinator.schedule_version += 1
+                await calendar.async_get_events(coordinator.hass, start, end)
+
+            async def cached(end: datetime = end) -> None:
+                await calendar.async_get_events(coordinator.hass, start, end)
+
+            cases.append((f"calendar.async_get_events {label} (cold)", cold))
+            cases.append((f"calendar.async_get_events {label} (cached)", cached))
+
+        for label, func in cases:
+            best, mean, peak = await measure(func, repeat, lambda: drain_story(coordinator))
+            print(f"{label:<44} {size:>7} {best:>10.2f} {mean:>10.2f} {peak / 1024:>10.1f}")
+
+
+def main() -> None:
+    """Parse the arguments and run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="plants per zone")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case")
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
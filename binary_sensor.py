@@ -1,5 +1,8 @@
 """Binary sensor for Flora Planner."""
+from typing import Any
+
 from homeassistant.components.binary_sensor import (
+    DOMAIN as BINARY_SENSOR_DOMAIN,
     BinarySensorEntity,
     BinarySensorDeviceClass,
 )
@@ -8,8 +11,15 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, CONF_ZONE_NAME, ATTR_WATERING_REQUIRED
-from . import FloraPlannerCoordinator
+from .const import DOMAIN, CONF_ZONE_NAME, CONF_PLANT_ENTITIES, ATTR_WATERING_REQUIRED
+from . import FloraPlannerCoordinator, zone_setting
+from .models import ZoneData
+from .entity import (
+    FloraPlannerPlantEntity,
+    async_remove_plant_entities,
+    async_setup_plant_entities,
+    zone_device_info,
+)
 
 
 async def async_setup_entry(
@@ -20,35 +30,68 @@ async def async_setup_entry(
     """Set up the Flora Planner binary sensor."""
     coordinator: FloraPlannerCoordinator = hass.data[DOMAIN][config_entry.entry_id]
     
-    async_add_entities(
-        [FloraPlannerWateringSensor(coordinator, config_entry)],
-        update_before_add=True,
-    )
+    zone_entities = [FloraPlannerWateringSensor(coordinator, config_entry)]
+    async_add_entities(zone_entities, update_before_add=True)
+
+    if zone_setting(config_entry, CONF_PLANT_ENTITIES, False):
+        async_setup_plant_entities(
+            coordinator,
+            config_entry,
+            async_add_entities,
+            lambda plant_name: [PlantWateringSensor(coordinator, config_entry, plant_name)],
+        )
+    else:
+        async_remove_plant_entities(hass, config_entry, BINARY_SENSOR_DOMAIN, zone_entities)
 
 
 class FloraPlannerWateringSensor(CoordinatorEntity, BinarySensorEntity):
     """Represents a binary sensor that indicates if watering is required for a zone."""
 
+    # Groeit met het aantal planten; niet in de database
+    _unrecorded_attributes = frozenset({"plant_watering_status"})
+
     def __init__(self, coordinator: FloraPlannerCoordinator, config_entry: ConfigEntry):
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._zone_name = config_entry.data[CONF_ZONE_NAME]
         self._attr_name = f"Flora Planner {self._zone_name} Watering Required"
         self._attr_unique_id = f"{config_entry.entry_id}_watering_required"
+        self._attr_device_info = zone_device_info(config_entry)
         self._attr_device_class = BinarySensorDeviceClass.MOISTURE
+        self._attributes_data: ZoneData | None = None
+        self._attributes: dict[str, Any] = {}
 
     @property
     def is_on(self) -> bool:
         """Return true if the binary sensor is on."""
         if self.coordinator.data:
-            return self.coordinator.data.get("watering_required", False)
+            return self.coordinator.data.watering_required
         return False
 
     @property
-    def extra_state_attributes(self):
+    def extra_state_attributes(self) -> dict[str, Any]:
         """Return the state attributes of the sensor."""
-        if self.coordinator.data:
-            return {
-                "plant_watering_status": self.coordinator.data.get("plant_watering_status")
-            }
-        return {}
+        data = self.coordinator.data
+        if data is not self._attributes_data:
+            # Eén keer per coordinator resultaat opbouwen
+            self._attributes_data = data
+            self._attributes = {"plant_watering_status": data.plant_watering_status} if data else {}
+        return self._attributes
+
+
+class PlantWateringSensor(FloraPlannerPlantEntity, BinarySensorEntity):
+    """Indicates if a single plant needs water today."""
+
+    _attr_device_class = BinarySensorDeviceClass.MOISTURE
+
+    def __init__(self, coordinator: FloraPlannerCoordinator, config_entry: ConfigEntry, plant_name: str):
+        """Initialize the sensor."""
+        super().__init__(coordinator, config_entry, plant_name, ATTR_WATERING_REQUIRED)
+        self._attr_name = f"Flora Planner {self._zone_name} {plant_name} Watering Required"
+
+    @property
+    def is_on(self) -> bool:
+        """Return true if the plant is due for water."""
+        if status := self._status:
+            return status.due
+        return False
@@ -1,26 +1,38 @@
 """Calendar platform for Flora Planner."""
-from datetime import date, timedelta, datetime
+from datetime import date, datetime, timedelta
+import heapq
 
 from homeassistant.components.calendar import CalendarEntity, CalendarEvent
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
     CONF_ZONE_NAME,
-    CONF_PLANTS,
-    CONF_PRUNE_MONTH,
-    CONF_SOW_MONTH,
-    CONF_HARVEST_MONTH,
     EVENT_WATER,
     EVENT_FEED,
     EVENT_PRUNE,
     EVENT_SOW,
     EVENT_HARVEST,
+    PLAN_HORIZON_DAYS,
 )
 from . import FloraPlannerCoordinator
+from .entity import zone_device_info
+from .schedule import ScheduledTask, first_task, iter_tasks
+
+# Zoveel opgevraagde periodes houden we per kalender vast
+EVENT_CACHE_SIZE = 16
+
+EVENT_SUMMARIES = {
+    EVENT_WATER: "Water",
+    EVENT_FEED: "Feed",
+    EVENT_PRUNE: "Prune",
+    EVENT_SOW: "Sow",
+    EVENT_HARVEST: "Harvest",
+}
 
 
 async def async_setup_entry(
@@ -45,74 +57,87 @@ class FloraPlannerCalendar(CoordinatorEntity, CalendarEntity):
         self._attr_name = f"Flora Planner {self._zone_name}"
         self._attr_unique_id = f"{config_entry.entry_id}_calendar"
         self._attr_icon = "mdi:flower"
+        self._attr_device_info = zone_device_info(config_entry)
         self._event: CalendarEvent | None = None
+        # Gegenereerde events per (start, eind); geldig zolang versie en dag gelijk blijven
+        self._events_cache: dict[tuple[date, date], list[CalendarEvent]] = {}
+        self._cache_key: tuple[int, date] | None = None
 
     @property
     def event(self) -> CalendarEvent | None:
         """Return the next upcoming event."""
         return self._event
 
+    async def async_added_to_hass(self) -> None:
+        """Determine the upcoming event as soon as the entity is added."""
+        await super().async_added_to_hass()
+        self._update_upcoming_event()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Recompute the upcoming event on every coordinator update."""
+        # Nieuw plan, dus de events binnen de horizon kunnen anders zijn
+        self._events_cache.clear()
+        self._update_upcoming_event()
+        super()._handle_coordinator_update()
+
     async def async_get_events(
         self, hass: HomeAssistant, start_date: datetime, end_date: datetime
     ) -> list[CalendarEvent]:
         """Get all events in a specific time frame."""
-        events = []
-        plants = self.coordinator.config_entry.options.get(CONF_PLANTS, [])
-        
-        for plant in plants:
-            plant_name = plant["plant_name"]
-            anchor_date = date.fromisoformat(plant["anchor_date"])
-            
-            water_interval = plant["watering_interval"]
-            feed_interval = plant["feeding_interval"]
-            prune_month = int(plant[CONF_PRUNE_MONTH])
-            sow_month = int(plant.get(CONF_SOW_MONTH, 0))
-            harvest_month = int(plant.get(CONF_HARVEST_MONTH, 0))
-
-            # Iterate through the date range to generate events
-            current_date = start_date.date()
-            while current_date <= end_date.date():
-                days_since_anchor = (current_date - anchor_date).days
-                if days_since_anchor < 0:
-                    current_date += timedelta(days=1)
-                    continue
-
-                # Watering
-                if (days_since_anchor % water_interval) == 0:
-                    events.append(self._create_event(current_date, f"Water {plant_name}", EVENT_WATER))
-
-                # Feeding
-                if (days_since_anchor % feed_interval) == 0:
-                    events.append(self._create_event(current_date, f"Feed {plant_name}", EVENT_FEED))
-
-                # Pruning
-                if current_date.month == prune_month and current_date.day == 1:
-                     events.append(self._create_event(current_date, f"Prune {plant_name}", EVENT_PRUNE))
-
-                # Sowing
-                if sow_month > 0 and current_date.month == sow_month and current_date.day == 1:
-                     events.append(self._create_event(current_date, f"Sow {plant_name}", EVENT_SOW))
-
-                # Harvesting
-                if harvest_month > 0 and current_date.month == harvest_month and current_date.day == 1:
-                     events.append(self._create_event(current_date, f"Harvest {plant_name}", EVENT_HARVEST))
-
-                current_date += timedelta(days=1)
-
-        # Sort events and update the next upcoming event
-        events.sort(key=lambda x: x.start)
-        now = datetime.now()
-        future_events = [e for e in events if e.start >= now.date() or (e.start_datetime_local and e.start_datetime_local >= now)]
-        self._event = future_events[0] if future_events else None
-
-        return events
-
-    def _create_event(self, event_date: date, summary: str, event_type: str) -> CalendarEvent:
+        self._validate_cache()
+        range_key = (start_date.date(), end_date.date())
+        if (events := self._events_cache.get(range_key)) is None:
+            events = self._generate_events(*range_key)
+            if len(self._events_cache) >= EVENT_CACHE_SIZE:
+                # Oudste periode eruit; dicts onthouden de volgorde van invoegen
+                del self._events_cache[next(iter(self._events_cache))]
+            self._events_cache[range_key] = events
+        return list(events)
+
+    @callback
+    def _validate_cache(self) -> None:
+        """Drop the cached events if the schedule or the day changed."""
+        cache_key = (self.coordinator.schedule_version, dt_util.now().date())
+        if cache_key != self._cache_key:
+            self._events_cache.clear()
+            self._cache_key = cache_key
+
+    def _generate_events(self, range_start: date, range_end: date) -> list[CalendarEvent]:
+        """Build the events of all plants between two dates, already in time order.
+
+        Within the horizon of the coordinator's plan the events come from
+        that plan, so the calendar shows the same tasks as the other entities.
+        """
+        scheduled = iter_tasks(self.coordinator.plants, range_start, range_end)
+        if (data := self.coordinator.data) is not None:
+            plan_end = data.day + timedelta(days=PLAN_HORIZON_DAYS - 1)
+            planned = [task for task in data.plan if range_start <= task.day <= range_end]
+            scheduled = heapq.merge(
+                planned,
+                (task for task in scheduled if not data.day <= task.day <= plan_end),
+            )
+        return [self._create_event(task) for task in scheduled]
+
+    @callback
+    def _update_upcoming_event(self) -> None:
+        """Take the first task from today on off the plan, or else the task stream."""
+        today = dt_util.now().date()
+        task = None
+        start = today
+        if (data := self.coordinator.data) is not None:
+            task = next((task for task in data.plan if task.day >= today), None)
+            start = max(today, data.day + timedelta(days=PLAN_HORIZON_DAYS))
+        if task is None:
+            task = first_task(self.coordinator.plants, start)
+        self._event = self._create_event(task) if task else None
+
+    def _create_event(self, task: ScheduledTask) -> CalendarEvent:
         """Helper to create a CalendarEvent."""
         return CalendarEvent(
-            summary=summary,
-            start=event_date,
-            end=event_date,
+            summary=f"{EVENT_SUMMARIES[task.kind]} {task.plant}",
+            start=task.day,
+            end=task.day,
             description=f"Task for zone: {self._zone_name}",
-            uid=f"{self.unique_id}-{event_type}-{event_date.isoformat()}"
+            uid=f"{self.unique_id}-{task.kind}-{task.day.isoformat()}"
         )
@@ -1,8 +1,6 @@
 """Config flow for Flora Planner."""
 import logging
 import random
-import json
-from datetime import date
 from typing import Any, Dict
 
 import voluptuous as vol
@@ -10,12 +8,11 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
 from homeassistant.helpers.selector import (
     SelectSelector, SelectSelectorConfig, SelectSelectorMode,
     EntitySelector, EntitySelectorConfig, BooleanSelector
 )
-import homeassistant.helpers.config_validation as cv
 
 from .const import (
     DOMAIN, CONF_ZONE_NAME, CONF_WEATHER_ENTITY, CONF_PLANTS,
@@ -25,8 +22,14 @@ from .const import (
     CONF_SOW_MONTH, CONF_HARVEST_MONTH, CONF_SPRINKLER_ENTITY,
     CONF_CYCLE_MINUTES, CONF_SOAK_MINUTES, CONF_MAX_CYCLES,
     CONF_DROUGHT_ONLY, CONF_WATER_START_MONTH, CONF_WATER_END_MONTH,
-    CONF_FEED_START_MONTH, CONF_FEED_END_MONTH, CONF_AUTO_WATER
+    CONF_FEED_START_MONTH, CONF_FEED_END_MONTH, CONF_AUTO_WATER,
+    CONF_MOISTURE_HYSTERESIS, DEFAULT_MOISTURE_HYSTERESIS, CONF_PLANT_ENTITIES,
+    CONF_AI_REQUESTS_PER_MINUTE, CONF_AI_REQUESTS_PER_DAY,
+    DEFAULT_AI_REQUESTS_PER_MINUTE, DEFAULT_AI_REQUESTS_PER_DAY,
+    CONF_MAX_CONCURRENT_VALVES, DEFAULT_MAX_CONCURRENT_VALVES
 )
+from .gemini import GeminiClient, GeminiError
+from .profiles import async_get_plant_profile, plant_slug
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,13 +37,8 @@ MONTHS = {str(i): f"{i}" for i in range(1, 13)}
 
 async def validate_api_key(hass: HomeAssistant, api_key: str) -> bool:
     """Validate the Gemini API key."""
-    session = async_get_clientsession(hass)
-    url = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
-    try:
-        async with session.get(url) as response:
-            return response.status == 200
-    except Exception:
-        return False
+    # Losse client: een ongeldige key hoeft niet gedeeld bewaard te worden
+    return await GeminiClient(hass, api_key).async_validate_key()
 
 class FloraPlannerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Flora Planner."""
@@ -85,6 +83,11 @@ class FloraPlannerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Required(CONF_CYCLE_MINUTES, default=5): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
                 vol.Required(CONF_SOAK_MINUTES, default=10): vol.All(vol.Coerce(int), vol.Range(min=0, max=60)),
                 vol.Required(CONF_MAX_CYCLES, default=5): vol.All(vol.Coerce(int), vol.Range(min=1, max=20)),
+                vol.Required(CONF_MOISTURE_HYSTERESIS, default=DEFAULT_MOISTURE_HYSTERESIS): vol.All(vol.Coerce(int), vol.Range(min=0, max=50)),
+                vol.Required(CONF_MAX_CONCURRENT_VALVES, default=DEFAULT_MAX_CONCURRENT_VALVES): vol.All(vol.Coerce(int), vol.Range(min=1, max=20)),
+                vol.Required(CONF_PLANT_ENTITIES, default=False): BooleanSelector(),
+                vol.Required(CONF_AI_REQUESTS_PER_MINUTE, default=DEFAULT_AI_REQUESTS_PER_MINUTE): vol.All(vol.Coerce(int), vol.Range(min=1, max=1000)),
+                vol.Required(CONF_AI_REQUESTS_PER_DAY, default=DEFAULT_AI_REQUESTS_PER_DAY): vol.All(vol.Coerce(int), vol.Range(min=1, max=100000)),
             })
         )
 
@@ -99,18 +102,55 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
     def __init__(self, config_entry: config_entries.ConfigEntry):
         self.config_entry = config_entry
-        self.current_plants = self.config_entry.options.get(CONF_PLANTS, [])
+        # Kopie, zodat we de lijst in de huidige opties niet aanpassen
+        self.current_plants = list(self.config_entry.options.get(CONF_PLANTS, []))
         self.plant_data = {}
 
     async def async_step_init(self, user_input=None):
-        return self.async_show_menu(step_id="init", menu_options=["add_plant_start", "remove_plant"])
+        return self.async_show_menu(step_id="init", menu_options=["add_plant_start", "remove_plant", "settings"])
+
+    async def async_step_settings(self, user_input=None):
+        """Change the settings of the zone."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data={**self.config_entry.options, **user_input})
+
+        # Instellingen uit de zone-setup zijn de standaard tot ze hier gewijzigd worden
+        current = {**self.config_entry.data, **self.config_entry.options}
+        return self.async_show_form(
+            step_id="settings",
+            data_schema=vol.Schema({
+                vol.Required(
+                    CONF_MOISTURE_HYSTERESIS,
+                    default=current.get(CONF_MOISTURE_HYSTERESIS, DEFAULT_MOISTURE_HYSTERESIS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=50)),
+                # Gedeeld door de sproeiers van alle zones; de strengste limiet geldt
+                vol.Required(
+                    CONF_MAX_CONCURRENT_VALVES,
+                    default=current.get(CONF_MAX_CONCURRENT_VALVES, DEFAULT_MAX_CONCURRENT_VALVES),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=20)),
+                # Wijzigen herlaadt de zone (zie async_update_options), dan komen of gaan de entiteiten
+                vol.Required(
+                    CONF_PLANT_ENTITIES, default=current.get(CONF_PLANT_ENTITIES, False)
+                ): BooleanSelector(),
+                # Gedeeld budget van alle zones; de strengste limieten gelden
+                vol.Required(
+                    CONF_AI_REQUESTS_PER_MINUTE,
+                    default=current.get(CONF_AI_REQUESTS_PER_MINUTE, DEFAULT_AI_REQUESTS_PER_MINUTE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1000)),
+                vol.Required(
+                    CONF_AI_REQUESTS_PER_DAY,
+                    default=current.get(CONF_AI_REQUESTS_PER_DAY, DEFAULT_AI_REQUESTS_PER_DAY),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100000)),
+            }),
+        )
 
     async def async_step_add_plant_start(self, user_input=None):
         """Start of the add plant flow: ask for name and if AI should be used."""
         errors = {}
         if user_input is not None:
             name = user_input[CONF_PLANT_NAME]
-            if any(p[CONF_PLANT_NAME] == name for p in self.current_plants):
+            # Namen met dezelfde slug zouden dezelfde entiteit-ID's krijgen
+            if any(plant_slug(p[CONF_PLANT_NAME]) == plant_slug(name) for p in self.current_plants):
                 errors["base"] = "name_exists"
             else:
                 self.plant_data = user_input
@@ -131,9 +171,9 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         if user_input is not None:
             # User has submitted the details form
             self.plant_data.update(user_input)
-            self.plant_data[CONF_ANCHOR_DATE] = date.today().isoformat()
+            self.plant_data[CONF_ANCHOR_DATE] = dt_util.now().date().isoformat()
             self.current_plants.append(self.plant_data)
-            return self.async_create_entry(title="", data={CONF_PLANTS: self.current_plants})
+            return self.async_create_entry(title="", data={**self.config_entry.options, CONF_PLANTS: self.current_plants})
 
         # This is the first time we show the details form
         plant_name = self.plant_data.get(CONF_PLANT_NAME)
@@ -148,12 +188,12 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 errors["base"] = "ai_failure"
 
         plant_schema = vol.Schema({
-            vol.Required(CONF_WATER_INTERVAL, default=ai_suggestions.get("water", 7)): cv.positive_int,
+            vol.Required(CONF_WATER_INTERVAL, default=ai_suggestions.get("water", 7)): vol.All(vol.Coerce(int), vol.Range(min=1, max=365)),
             vol.Optional(CONF_DROUGHT_ONLY, default=ai_suggestions.get("drought_only", False)): BooleanSelector(),
             vol.Optional(CONF_AUTO_WATER, default=True): BooleanSelector(),
             vol.Required(CONF_WATER_START_MONTH, default=ai_suggestions.get("water_start", "1")): SelectSelector(SelectSelectorConfig(options=list(MONTHS.keys()), mode=SelectSelectorMode.DROPDOWN)),
             vol.Required(CONF_WATER_END_MONTH, default=ai_suggestions.get("water_end", "12")): SelectSelector(SelectSelectorConfig(options=list(MONTHS.keys()), mode=SelectSelectorMode.DROPDOWN)),
-            vol.Required(CONF_FEED_INTERVAL, default=ai_suggestions.get("feed", 30)): cv.positive_int,
+            vol.Required(CONF_FEED_INTERVAL, default=ai_suggestions.get("feed", 30)): vol.All(vol.Coerce(int), vol.Range(min=1, max=365)),
             vol.Required(CONF_FEED_START_MONTH, default=ai_suggestions.get("feed_start", "3")): SelectSelector(SelectSelectorConfig(options=list(MONTHS.keys()), mode=SelectSelectorMode.DROPDOWN)),
             vol.Required(CONF_FEED_END_MONTH, default=ai_suggestions.get("feed_end", "10")): SelectSelector(SelectSelectorConfig(options=list(MONTHS.keys()), mode=SelectSelectorMode.DROPDOWN)),
             vol.Required(CONF_PRUNE_MONTH, default=ai_suggestions.get("prune", "6")): SelectSelector(
@@ -181,88 +221,28 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         )
 
     async def _get_ai_suggestions(self, plant_name: str) -> Dict[str, Any]:
-        """Get plant care suggestions from Gemini."""
-        prompt = (
-            f"Voor de plant '{plant_name}', geef een JSON-object met 'watering_interval' (dagen), 'drought_tolerant' (boolean), 'min_moisture' (percentage 0-100, standaard 20), "
-            f"'feeding_interval' (dagen), 'water_start_month' (1-12), 'water_end_month' (1-12), 'feed_start_month' (1-12), 'feed_end_month' (1-12), "
-            f"'pruning_month' (1-12), 'sowing_month' (1-12, 0=nvt), 'harvesting_month' (1-12, 0=nvt). "
-            f"Geef alleen JSON."
-        )
+        """Get plant care suggestions from Gemini (or the profile cache)."""
         api_key = self.config_entry.data.get(CONF_GEMINI_API_KEY)
-        session = async_get_clientsession(self.hass)
-        
-        models = ["gemini-1.5-flash", "gemini-pro"]
-        result = None
-        
-        for model in models:
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
-            payload = {"contents": [{"parts": [{"text": prompt}]}]}
-            try:
-                async with session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        break
-            except Exception:
-                continue
-        
-        if not result:
-            raise Exception("Kon geen verbinding maken met Gemini (alle modellen geprobeerd).")
-        
         try:
-            # Extract text from Gemini response structure
-            text_response = result["candidates"][0]["content"]["parts"][0]["text"]
-            # Clean up markdown code blocks if present
-            clean_text = text_response.strip().replace("```json", "").replace("```", "")
-            data = json.loads(clean_text)
-        except (KeyError, IndexError, json.JSONDecodeError) as e:
+            profile = await async_get_plant_profile(self.hass, api_key, plant_name)
+        except GeminiError as e:
+            raise Exception(f"Kon geen verbinding maken met Gemini: {e}")
+        except ValueError as e:
             raise Exception(f"Failed to parse AI response: {e}")
-        
-        # --- Sanity Check (Geloofwaardigheidscheck) ---
-        # We controleren of de waarden logisch zijn. Zo niet, vallen we terug op defaults.
-        
-        water = data.get("watering_interval", 7)
-        if not isinstance(water, int) or water < 1 or water > 60:
-            water = 7 # Fallback: 1 week
-
-        feed = data.get("feeding_interval", 30)
-        if not isinstance(feed, int) or feed < 1 or feed > 365:
-            feed = 30 # Fallback: 1 maand
-
-        prune = str(data.get("pruning_month", 6))
-        if prune not in MONTHS:
-            prune = "1" # Fallback: Januari
-
-        sow = str(data.get("sowing_month", 0))
-        if sow not in MONTHS and sow != "0":
-            sow = "0"
-
-        harvest = str(data.get("harvesting_month", 0))
-        if harvest not in MONTHS and harvest != "0":
-            harvest = "0"
-
-        min_moist = data.get("min_moisture", 20)
-        if not isinstance(min_moist, int) or min_moist < 0 or min_moist > 100:
-            min_moist = 20
-
-        drought_only = data.get("drought_tolerant", False)
-
-        water_start = str(data.get("water_start_month", 1))
-        water_end = str(data.get("water_end_month", 12))
-        feed_start = str(data.get("feed_start_month", 3))
-        feed_end = str(data.get("feed_end_month", 10))
 
+        # Het profiel is al gecontroleerd (sanity check); omzetten naar formulier waarden
         return {
-            "water": water,
-            "feed": feed,
-            "prune": prune,
-            "sow": sow,
-            "harvest": harvest,
-            "min_moisture": min_moist,
-            "drought_only": drought_only,
-            "water_start": water_start,
-            "water_end": water_end,
-            "feed_start": feed_start,
-            "feed_end": feed_end,
+            "water": profile["watering_interval"],
+            "feed": profile["feeding_interval"],
+            "prune": str(profile["pruning_month"]),
+            "sow": str(profile["sowing_month"]),
+            "harvest": str(profile["harvesting_month"]),
+            "min_moisture": profile["min_moisture"],
+            "drought_only": profile["drought_tolerant"],
+            "water_start": str(profile["water_start_month"]),
+            "water_end": str(profile["water_end_month"]),
+            "feed_start": str(profile["feed_start_month"]),
+            "feed_end": str(profile["feed_end_month"]),
         }
 
     async def async_step_remove_plant(self, user_input=None):
@@ -271,7 +251,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         if user_input is not None:
             plant_to_remove = user_input["plant_to_remove"]
             self.current_plants = [p for p in self.current_plants if p[CONF_PLANT_NAME] != plant_to_remove]
-            return self.async_create_entry(title="", data={CONF_PLANTS: self.current_plants})
+            return self.async_create_entry(title="", data={**self.config_entry.options, CONF_PLANTS: self.current_plants})
 
         plant_names = [p[CONF_PLANT_NAME] for p in self.current_plants]
         if not plant_names:
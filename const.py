@@ -1,4 +1,5 @@
 """Constants for the Flora Planner integration."""
+from datetime import timedelta
 from typing import Final
 
 DOMAIN: Final = "flora_planner"
@@ -11,6 +12,11 @@ CONF_SPRINKLER_ENTITY: Final = "sprinkler_entity"
 CONF_CYCLE_MINUTES: Final = "cycle_minutes"
 CONF_SOAK_MINUTES: Final = "soak_minutes"
 CONF_MAX_CYCLES: Final = "max_cycles"
+CONF_MOISTURE_HYSTERESIS: Final = "moisture_hysteresis"
+CONF_PLANT_ENTITIES: Final = "plant_entities"
+CONF_AI_REQUESTS_PER_MINUTE: Final = "ai_requests_per_minute"
+CONF_AI_REQUESTS_PER_DAY: Final = "ai_requests_per_day"
+CONF_MAX_CONCURRENT_VALVES: Final = "max_concurrent_valves"
 CONF_PLANTS: Final = "plants"
 CONF_PLANT_NAME: Final = "plant_name"
 CONF_USE_AI: Final = "use_ai"
@@ -31,8 +37,48 @@ CONF_AUTO_WATER: Final = "auto_water"
 
 # Weather & Soil Logic
 TEMP_THRESHOLD: Final = 28  # Celsius
+COLD_THRESHOLD: Final = 10  # Celsius
 PRECIP_THRESHOLD: Final = 5  # mm
 SOIL_MOISTURE_THRESHOLD: Final = 20 # Percent
+DEFAULT_MOISTURE_HYSTERESIS: Final = 5  # Percent boven min_moisture om te stoppen
+
+# Refresh: event gedreven, met een lang interval als vangnet
+SAFETY_REFRESH_INTERVAL: Final = timedelta(hours=6)
+REFRESH_COOLDOWN: Final = 5  # seconden
+# Zones verspreid over het interval en over het begin van de dag, en
+# zoveel refreshes tegelijk over alle zones heen
+MAX_CONCURRENT_REFRESHES: Final = 2
+DAY_CHANGE_SPREAD: Final = timedelta(minutes=10)
+
+# Vanaf zoveel planten rekent de coordinator met parallelle arrays (batch.py)
+BATCH_MIN_PLANTS: Final = 500
+
+# Takenplan: zoveel dagen vooruit, en waarom een taak gepland staat
+PLAN_HORIZON_DAYS: Final = 7
+REASON_SCHEDULE: Final = "schedule"
+REASON_SOIL_MOISTURE: Final = "soil_moisture"
+REASON_HEAT: Final = "heat"
+
+# Sproeien: zoveel kleppen mogen tegelijk open over alle zones heen (strengste limiet geldt)
+DEFAULT_MAX_CONCURRENT_VALVES: Final = 2
+
+# Services
+DEFAULT_AI_CONCURRENCY: Final = 4  # gelijktijdige AI lookups bij add_plants
+
+# Gemini budget, gedeeld door alle zones (strengste limieten gelden)
+DEFAULT_AI_REQUESTS_PER_MINUTE: Final = 10
+DEFAULT_AI_REQUESTS_PER_DAY: Final = 1000
+
+# hass.data keys (naast de coordinators per entry_id)
+DATA_STORY_CACHE: Final = "story_cache"
+DATA_WEATHER_HUBS: Final = "weather_hubs"
+DATA_GEMINI_CLIENTS: Final = "gemini_clients"
+DATA_PROFILE_CACHE: Final = "profile_cache"
+DATA_GEMINI_BUDGET: Final = "gemini_budget"
+DATA_VALVE_SCHEDULER: Final = "valve_scheduler"
+DATA_REFRESH_SCHEDULER: Final = "refresh_scheduler"
+DATA_METRICS: Final = "metrics"
+DATA_METRICS_VIEW: Final = "metrics_view"
 
 # Platforms
 PLATFORMS: Final = ["sensor", "binary_sensor", "calendar", "switch"]
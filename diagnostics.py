@@ -0,0 +1,63 @@
+"""Diagnostics support for Flora Planner."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_GEMINI_API_KEY,
+    CONF_PLANTS,
+    DATA_GEMINI_BUDGET,
+    DATA_GEMINI_CLIENTS,
+    DATA_PROFILE_CACHE,
+    DATA_STORY_CACHE,
+    DOMAIN,
+)
+from . import FloraPlannerCoordinator
+
+TO_REDACT = {CONF_GEMINI_API_KEY}
+
+
+def _scrub(value: Any, secret: str) -> Any:
+    """Replace a secret inside (nested) strings, e.g. a request URL in an error."""
+    if isinstance(value, str):
+        return value.replace(secret, REDACTED)
+    if isinstance(value, dict):
+        return {key: _scrub(item, secret) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_scrub(item, secret) for item in value]
+    return value
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a zone."""
+    coordinator: FloraPlannerCoordinator = hass.data[DOMAIN][entry.entry_id]
+    domain_data = hass.data[DOMAIN]
+    api_key = entry.data.get(CONF_GEMINI_API_KEY)
+
+    gemini = domain_data.get(DATA_GEMINI_CLIENTS, {}).get(api_key)
+    story_cache = domain_data.get(DATA_STORY_CACHE)
+    profile_cache = domain_data.get(DATA_PROFILE_CACHE)
+    budget = domain_data.get(DATA_GEMINI_BUDGET)
+
+    diagnostics = {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": {key: value for key, value in entry.options.items() if key != CONF_PLANTS},
+        },
+        "plant_count": len(coordinator.plants),
+        "schedule_version": coordinator.schedule_version,
+        "last_update_success": coordinator.last_update_success,
+        "refreshes": coordinator.stats.as_dict(),
+        "gemini": gemini.stats.as_dict() if gemini else None,
+        "gemini_budget": budget.as_dict() if budget else None,
+        "story_cache": story_cache.stats.as_dict() if story_cache else None,
+        "profile_cache": profile_cache.stats.as_dict() if profile_cache else None,
+    }
+    # Foutmeldingen kunnen de request URL bevatten, inclusief de key
+    return _scrub(diagnostics, api_key) if api_key else diagnostics
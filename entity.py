@@ -0,0 +1,105 @@
+"""Shared entity helpers for Flora Planner."""
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.entity import DeviceInfo, Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import CONF_ZONE_NAME, DOMAIN
+from . import FloraPlannerCoordinator
+from .models import PlantStatus
+from .profiles import plant_slug
+
+
+def zone_device_info(config_entry: ConfigEntry) -> DeviceInfo:
+    """Return the device that groups all entities of a zone."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, config_entry.entry_id)},
+        name=f"Flora Planner {config_entry.data[CONF_ZONE_NAME]}",
+        manufacturer="Flora Planner",
+        entry_type=DeviceEntryType.SERVICE,
+    )
+
+
+class FloraPlannerPlantEntity(CoordinatorEntity):
+    """Base for an entity about a single plant of a zone."""
+
+    def __init__(
+        self,
+        coordinator: FloraPlannerCoordinator,
+        config_entry: ConfigEntry,
+        plant_name: str,
+        key: str,
+    ) -> None:
+        """Initialize the plant entity."""
+        super().__init__(coordinator)
+        self._plant_name = plant_name
+        self._zone_name = config_entry.data[CONF_ZONE_NAME]
+        self._attr_unique_id = f"{config_entry.entry_id}_{plant_slug(plant_name)}_{key}"
+        self._attr_device_info = zone_device_info(config_entry)
+
+    @property
+    def _status(self) -> PlantStatus | None:
+        """Return the coordinator data of this plant."""
+        if self.coordinator.data is None:
+            return None
+        return self.coordinator.data.plants.get(self._plant_name)
+
+    @property
+    def available(self) -> bool:
+        """Return True while the plant is part of the zone."""
+        return super().available and self._status is not None
+
+
+@callback
+def async_setup_plant_entities(
+    coordinator: FloraPlannerCoordinator,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    entity_factory: Callable[[str], list[Entity]],
+) -> None:
+    """Keep one set of entities per plant in sync with the plants of the zone.
+
+    Plants can be added and removed without reloading the entry, so new
+    plants get their entities on the next coordinator update and entities
+    of removed plants are taken out of the entity registry.
+    """
+    plant_entities: dict[str, list[Entity]] = {}
+
+    @callback
+    def _async_sync_plants() -> None:
+        plant_names = {plant.name for plant in coordinator.plants}
+
+        new_entities: list[Entity] = []
+        for plant_name in plant_names - plant_entities.keys():
+            plant_entities[plant_name] = entity_factory(plant_name)
+            new_entities.extend(plant_entities[plant_name])
+        if new_entities:
+            async_add_entities(new_entities)
+
+        registry = er.async_get(coordinator.hass)
+        for plant_name in plant_entities.keys() - plant_names:
+            for entity in plant_entities.pop(plant_name):
+                if entity.entity_id and registry.async_get(entity.entity_id):
+                    registry.async_remove(entity.entity_id)
+
+    _async_sync_plants()
+    config_entry.async_on_unload(coordinator.async_add_listener(_async_sync_plants))
+
+
+@callback
+def async_remove_plant_entities(
+    hass: HomeAssistant, config_entry: ConfigEntry, domain: str, zone_entities: list[Entity]
+) -> None:
+    """Remove the per-plant entities of a platform after they were switched off."""
+    keep = {entity.unique_id for entity in zone_entities}
+    registry = er.async_get(hass)
+    for entry in er.async_entries_for_config_entry(registry, config_entry.entry_id):
+        if entry.domain == domain and entry.unique_id not in keep:
+            registry.async_remove(entry.entity_id)
@@ -0,0 +1,222 @@
+"""Gemini API client shared by all Flora Planner AI features."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import DATA_GEMINI_CLIENTS, DOMAIN
+from .gemini_budget import PRIORITY_INTERACTIVE, BudgetExhausted, async_get_gemini_budget
+from .instrumentation import GeminiStats
+from .metrics import FloraPlannerMetrics, async_get_metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+API_URL = "https://generativelanguage.googleapis.com/v1beta"
+MODELS = ("gemini-1.5-flash", "gemini-pro")
+
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0  # seconden, verdubbelt per poging
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GeminiError(HomeAssistantError):
+    """Gemini could not produce an answer."""
+
+
+class GeminiAuthError(GeminiError):
+    """The API key was rejected."""
+
+
+class GeminiQuotaError(GeminiError):
+    """The shared request budget does not allow a request right now."""
+
+
+class _SharedRequest:
+    """A generate request in flight and the number of callers awaiting it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future[str]) -> None:
+        """Track a new request, before anyone awaits it."""
+        self.task = task
+        self.waiters = 0
+
+
+class GeminiClient:
+    """Talks to Gemini with timeouts, retries and request coalescing.
+
+    Identical prompts with the same priority that are already in flight
+    share a single request; it is cancelled once nobody awaits it anymore.
+    Every generate request is taken from the budget shared by all clients
+    (see gemini_budget.py), with the priority of the caller.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, api_key: str, metrics: FloraPlannerMetrics | None = None
+    ) -> None:
+        """Initialize the client; without metrics the requests are not recorded there."""
+        self._session = async_get_clientsession(hass)
+        self._api_key = api_key
+        # (prompt, prioriteit) -> lopend verzoek
+        self._in_flight: dict[tuple[str, str], _SharedRequest] = {}
+        self.stats = GeminiStats()
+        self._metrics = metrics
+        self._budget = async_get_gemini_budget(hass)
+
+    async def async_generate(self, prompt: str, priority: str = PRIORITY_INTERACTIVE) -> str:
+        """Return Gemini's answer to a prompt.
+
+        Raises GeminiQuotaError if the budget has no room for the request;
+        background requests get that right away instead of waiting.
+        """
+        # De prioriteit hoort bij de sleutel: een achtergrondverzoek wacht niet op
+        # het budget, dus een interactieve aanroeper mag daar niet op meeliften
+        key = (prompt, priority)
+        if (request := self._in_flight.get(key)) is None:
+            request = _SharedRequest(asyncio.ensure_future(self._async_generate(prompt, priority)))
+            self._in_flight[key] = request
+            request.task.add_done_callback(lambda _: self._async_forget(key, request))
+        else:
+            self.stats.coalesced += 1
+
+        request.waiters += 1
+        try:
+            # shield: als één aanroeper annuleert, loopt het verzoek door voor de rest
+            return await asyncio.shield(request.task)
+        finally:
+            request.waiters -= 1
+            if not request.waiters and not request.task.done():
+                # Niemand wacht nog op het antwoord; nieuwe aanroepers starten een eigen verzoek
+                self._async_forget(key, request)
+                request.task.cancel()
+
+    @callback
+    def _async_forget(self, key: tuple[str, str], request: _SharedRequest) -> None:
+        """Stop sharing a request, unless a newer one already took its place."""
+        if self._in_flight.get(key) is request:
+            del self._in_flight[key]
+
+    async def async_validate_key(self) -> bool:
+        """Return True if the API key is accepted."""
+        try:
+            await self._async_request("get", f"{API_URL}/models")
+        except GeminiError:
+            return False
+        return True
+
+    async def _async_generate(self, prompt: str, priority: str) -> str:
+        """Answer a prompt, recording latency and outcome."""
+        start = time.monotonic()
+        try:
+            answer = await self._async_generate_with_fallback(prompt, priority)
+        except GeminiError:
+            self.stats.async_record(time.monotonic() - start, error=True)
+            raise
+        self.stats.async_record(time.monotonic() - start, error=False)
+        return answer
+
+    async def _async_generate_with_fallback(self, prompt: str, priority: str) -> str:
+        """Try the models in order of preference."""
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        last_err: GeminiError | None = None
+        for model in MODELS:
+            start = time.monotonic()
+            try:
+                result = await self._async_request(
+                    "post", f"{API_URL}/models/{model}:generateContent", payload, priority
+                )
+            except GeminiQuotaError:
+                raise
+            except GeminiAuthError:
+                self._async_observe(model, "auth_error", start)
+                raise
+            except GeminiError as err:
+                self._async_observe(model, "error", start)
+                _LOGGER.debug(f"Gemini model {model} mislukt: {err}")
+                last_err = err
+                continue
+
+            try:
+                text = result["candidates"][0]["content"]["parts"][0]["text"]
+            except (KeyError, IndexError, TypeError) as err:
+                self._async_observe(model, "bad_response", start)
+                last_err = GeminiError(f"Onverwacht antwoord van {model}: {err}")
+                continue
+            self._async_observe(model, "success", start)
+            return text
+
+        raise last_err or GeminiError("Geen Gemini model beschikbaar")
+
+    @callback
+    def _async_observe(self, model: str, outcome: str, start: float) -> None:
+        """Record a finished model request in the metrics, if the client has them."""
+        if self._metrics is not None:
+            self._metrics.async_observe_gemini(model, outcome, time.monotonic() - start)
+
+    async def _async_request(
+        self,
+        method: str,
+        url: str,
+        payload: dict[str, Any] | None = None,
+        priority: str | None = None,
+    ) -> dict[str, Any]:
+        """Do one API request, retrying 429/5xx and network errors with backoff.
+
+        With a priority every attempt is taken from the budget first.
+        """
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+            if priority is not None:
+                try:
+                    await self._budget.async_acquire(priority)
+                except BudgetExhausted as err:
+                    raise GeminiQuotaError(str(err)) from err
+            try:
+                async with self._session.request(
+                    method,
+                    url,
+                    params={"key": self._api_key},
+                    json=payload,
+                    timeout=REQUEST_TIMEOUT,
+                ) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    if response.status in (401, 403):
+                        raise GeminiAuthError(f"API key geweigerd ({response.status})")
+                    if response.status not in RETRY_STATUSES:
+                        raise GeminiError(f"Gemini API error: {response.status}")
+                    if retry_after := response.headers.get("Retry-After"):
+                        try:
+                            delay = min(BACKOFF_MAX, float(retry_after))
+                        except ValueError:
+                            pass
+                    error = GeminiError(f"Gemini API error: {response.status}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                error = GeminiError(f"Kon Gemini niet bereiken: {err}")
+
+            if attempt == MAX_ATTEMPTS:
+                raise error
+            self.stats.retries += 1
+            _LOGGER.debug(f"{error}; nieuwe poging {attempt + 1}/{MAX_ATTEMPTS} over {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+        raise GeminiError("Geen pogingen meer over")
+
+
+@callback
+def async_get_gemini_client(hass: HomeAssistant, api_key: str) -> GeminiClient:
+    """Return the shared client for an API key."""
+    clients: dict[str, GeminiClient] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_GEMINI_CLIENTS, {})
+    if (client := clients.get(api_key)) is None:
+        client = clients[api_key] = GeminiClient(hass, api_key, async_get_metrics(hass))
+    return client
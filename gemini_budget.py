@@ -0,0 +1,176 @@
+"""Gemini request budget shared by all Flora Planner entries."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, NoReturn
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import (
+    DATA_GEMINI_BUDGET,
+    DEFAULT_AI_REQUESTS_PER_DAY,
+    DEFAULT_AI_REQUESTS_PER_MINUTE,
+    DOMAIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Iemand wacht op het antwoord (service, formulier) of het is achtergrondwerk
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+
+INTERACTIVE_RESERVE = 0.2  # deel van elk budget dat achtergrondwerk overlaat
+INTERACTIVE_MAX_WAIT = 30.0  # seconden
+
+MINUTE = 60.0
+DAY = 86400.0
+
+
+class BudgetExhausted(Exception):
+    """No request may be made right now."""
+
+
+class TokenBucket:
+    """Holds up to capacity tokens and refills them evenly over period seconds."""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: int, period: float) -> None:
+        """Start with a full bucket."""
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        """Add the tokens that came in since the last refill."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, needed: float) -> float:
+        """Return the seconds until the bucket holds the needed tokens (after a refill)."""
+        if self.tokens >= needed:
+            return 0.0
+        if needed > self.capacity:
+            return math.inf
+        return (needed - self.tokens) / self.rate
+
+
+class GeminiBudget:
+    """Per-minute and daily token buckets for all Gemini requests.
+
+    Interactive requests may use the whole budget and wait a while for the
+    per-minute bucket. Background requests never wait: they only get a
+    token if INTERACTIVE_RESERVE of both buckets stays free and nobody is
+    waiting, and are refused otherwise, so the caller can fall back.
+
+    Every zone sets its own limits in its options, but the budget is
+    shared: the strictest per-minute and daily limits apply to all zones.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the budget with the default limits."""
+        # entry_id -> (per minuut, per dag); het strengste paar geldt
+        self._limits: dict[str, tuple[int, int]] = {}
+        self._minute = TokenBucket(DEFAULT_AI_REQUESTS_PER_MINUTE, MINUTE)
+        self._day = TokenBucket(DEFAULT_AI_REQUESTS_PER_DAY, DAY)
+        self._waiting = 0
+        self.granted = {PRIORITY_INTERACTIVE: 0, PRIORITY_BACKGROUND: 0}
+        self.refused = {PRIORITY_INTERACTIVE: 0, PRIORITY_BACKGROUND: 0}
+
+    @callback
+    def async_set_limits(self, entry_id: str, per_minute: int, per_day: int) -> CALLBACK_TYPE:
+        """Apply the limits of an entry; returns the callback that withdraws them."""
+        self._limits[entry_id] = (per_minute, per_day)
+        self._async_apply_limits()
+
+        @callback
+        def remove() -> None:
+            if self._limits.pop(entry_id, None) is not None:
+                self._async_apply_limits()
+
+        return remove
+
+    @callback
+    def _async_apply_limits(self) -> None:
+        """Resize the buckets to the strictest limits, keeping the tokens already used."""
+        per_minute = min((limits[0] for limits in self._limits.values()), default=DEFAULT_AI_REQUESTS_PER_MINUTE)
+        per_day = min((limits[1] for limits in self._limits.values()), default=DEFAULT_AI_REQUESTS_PER_DAY)
+        now = time.monotonic()
+        for name, capacity, period in (("_minute", per_minute, MINUTE), ("_day", per_day, DAY)):
+            old = getattr(self, name)
+            if old.capacity == capacity:
+                continue
+            old.refill(now)
+            bucket = TokenBucket(capacity, period)
+            bucket.tokens = max(0.0, capacity - (old.capacity - old.tokens))
+            setattr(self, name, bucket)
+
+    async def async_acquire(self, priority: str) -> None:
+        """Take one request from the budget.
+
+        Raises BudgetExhausted if a background request has no room, the
+        daily budget is used up, or the per-minute budget stays empty for
+        longer than INTERACTIVE_MAX_WAIT.
+        """
+        background = priority == PRIORITY_BACKGROUND
+        deadline = time.monotonic() + INTERACTIVE_MAX_WAIT
+        while True:
+            now = time.monotonic()
+            self._minute.refill(now)
+            self._day.refill(now)
+            needed_minute = needed_day = 1.0
+            if background:
+                needed_minute += math.floor(self._minute.capacity * INTERACTIVE_RESERVE)
+                needed_day += math.floor(self._day.capacity * INTERACTIVE_RESERVE)
+
+            if self._day.tokens < needed_day:
+                self._async_refuse(priority, "daglimiet")
+            wait = self._minute.wait_time(needed_minute)
+            if wait == 0 and not (background and self._waiting):
+                self._minute.tokens -= 1
+                self._day.tokens -= 1
+                self.granted[priority] += 1
+                return
+            if background or now + wait > deadline:
+                self._async_refuse(priority, "minuutlimiet")
+
+            self._waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._waiting -= 1
+
+    @callback
+    def _async_refuse(self, priority: str, limit: str) -> NoReturn:
+        """Count and raise a refused request."""
+        self.refused[priority] += 1
+        _LOGGER.debug(f"Gemini {priority} verzoek geweigerd: {limit} bereikt")
+        raise BudgetExhausted(f"Gemini {limit} van Flora Planner bereikt")
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the budget for the diagnostics."""
+        now = time.monotonic()
+        self._minute.refill(now)
+        self._day.refill(now)
+        return {
+            "per_minute": self._minute.capacity,
+            "per_day": self._day.capacity,
+            "available_minute": round(self._minute.tokens, 2),
+            "available_day": round(self._day.tokens, 2),
+            "waiting": self._waiting,
+            "granted": dict(self.granted),
+            "refused": dict(self.refused),
+        }
+
+
+@callback
+def async_get_gemini_budget(hass: HomeAssistant) -> GeminiBudget:
+    """Return the budget shared by all Gemini clients."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (budget := domain_data.get(DATA_GEMINI_BUDGET)) is None:
+        budget = domain_data[DATA_GEMINI_BUDGET] = GeminiBudget()
+    return budget
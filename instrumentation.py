@@ -0,0 +1,161 @@
+"""Lightweight in-process statistics for the diagnostics of Flora Planner.
+
+Everything here is a handful of counters and bounded deques, cheap enough
+to stay on in production.
+"""
+from __future__ import annotations
+
+from collections import deque
+import math
+import time
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
+
+REFRESH_HISTORY = 20  # laatste refreshes en weekverhalen per zone
+LATENCY_SAMPLES = 200  # laatste Gemini aanroepen
+
+
+def percentile(samples: list[float], pct: float) -> float | None:
+    """Return the nearest-rank percentile of already sorted samples."""
+    if not samples:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(samples)))
+    return samples[rank - 1]
+
+
+class RefreshTimer:
+    """Times the phases of a single coordinator refresh."""
+
+    def __init__(self) -> None:
+        """Start timing."""
+        self.started = dt_util.utcnow()
+        self._start = self._lap = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    def lap(self, phase: str) -> None:
+        """Record the time since the previous lap as the duration of a phase."""
+        now = time.perf_counter()
+        self.phases[phase] = round((now - self._lap) * 1000, 2)
+        self._lap = now
+
+    @property
+    def total(self) -> float:
+        """Return the time since the start in milliseconds."""
+        return round((time.perf_counter() - self._start) * 1000, 2)
+
+
+class RefreshStats:
+    """The last refreshes of a zone: phase durations and outcome.
+
+    The weekly story is generated in the background, after the refresh that
+    planned its tasks, so its generations are kept as a phase of their own.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the history."""
+        self._history: deque[dict[str, Any]] = deque(maxlen=REFRESH_HISTORY)
+        self._stories: deque[dict[str, Any]] = deque(maxlen=REFRESH_HISTORY)
+        self.failures = 0
+        self.story_failures = 0
+
+    @callback
+    def async_record(self, timer: RefreshTimer, plant_count: int, error: Exception | None = None) -> None:
+        """Record the outcome of a refresh."""
+        if error is not None:
+            self.failures += 1
+        self._history.append(
+            {
+                "started": timer.started.isoformat(),
+                "duration_ms": timer.total,
+                "phases_ms": dict(timer.phases),
+                "plant_count": plant_count,
+                "outcome": "ok" if error is None else f"{type(error).__name__}: {error}",
+            }
+        )
+
+    @callback
+    def async_record_story(self, timer: RefreshTimer, source: str, error: Exception | None = None) -> None:
+        """Record a weekly story generation and where the story came from."""
+        if error is not None:
+            self.story_failures += 1
+        self._stories.append(
+            {
+                "started": timer.started.isoformat(),
+                "duration_ms": timer.total,
+                "source": source,
+                "outcome": "ok" if error is None else f"{type(error).__name__}: {error}",
+            }
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics for the diagnostics."""
+        return {
+            "failures": self.failures,
+            "recent": list(self._history),
+            "story": {"failures": self.story_failures, "recent": list(self._stories)},
+        }
+
+
+class GeminiStats:
+    """Latencies and error counts of the Gemini client."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self._latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.requests = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.retries = 0
+
+    @callback
+    def async_record(self, latency: float, error: bool) -> None:
+        """Record one answered or failed generate call, latency in seconds."""
+        self.requests += 1
+        self._latencies.append(round(latency * 1000, 1))
+        if error:
+            self.errors += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics for the diagnostics."""
+        samples = sorted(self._latencies)
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "retries": self.retries,
+            "latency_ms": {
+                "samples": len(samples),
+                "p50": percentile(samples, 50),
+                "p90": percentile(samples, 90),
+                "p99": percentile(samples, 99),
+                "max": samples[-1] if samples else None,
+            },
+        }
+
+
+class CacheStats:
+    """Hit and miss counters of a cache."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.hits = 0
+        self.misses = 0
+
+    @callback
+    def async_hit(self, hit: bool) -> None:
+        """Count one lookup."""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics for the diagnostics."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
@@ -0,0 +1,195 @@
+"""OpenMetrics endpoint for Flora Planner internals."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterable
+from http import HTTPStatus
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_METRICS, DATA_METRICS_VIEW, DOMAIN
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PREFIX = DOMAIN
+
+REFRESH_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+GEMINI_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram; observing is a bisect and two additions."""
+
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        """Allocate the buckets, the last one is +Inf."""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Count one observation."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def _escape(value: str) -> str:
+    """Escape a label value as OpenMetrics requires."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    """Format a label set."""
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _histogram_lines(name: str, labels: dict[str, str], histogram: Histogram) -> Iterable[str]:
+    """Render the samples of one histogram."""
+    cumulative = 0
+    for bound, count in zip((*histogram.bounds, "+Inf"), histogram.counts):
+        cumulative += count
+        yield f"{name}_bucket{{{_labels(**labels, le=str(bound))}}} {cumulative}"
+    yield f"{name}_count{{{_labels(**labels)}}} {histogram.count}"
+    yield f"{name}_sum{{{_labels(**labels)}}} {histogram.total}"
+
+
+class FloraPlannerMetrics:
+    """Counters and histograms of all zones, updated where things happen.
+
+    The hot paths only bump pre-allocated counters; a scrape reads them and
+    renders the text, without calling into the zones.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.refresh_duration: dict[str, Histogram] = {}
+        # (model, outcome) -> latency histogram; its count is the request count
+        self.gemini_latency: dict[tuple[str, str], Histogram] = {}
+        self.valve_open_seconds: dict[str, float] = {}
+        self.watering_cycles: dict[str, int] = {}
+        self.plants: dict[str, int] = {}
+
+    @callback
+    def async_observe_refresh(self, zone_name: str, seconds: float) -> None:
+        """Record the duration of a coordinator refresh."""
+        if (histogram := self.refresh_duration.get(zone_name)) is None:
+            histogram = self.refresh_duration[zone_name] = Histogram(REFRESH_BUCKETS)
+        histogram.observe(seconds)
+
+    @callback
+    def async_observe_gemini(self, model: str, outcome: str, seconds: float) -> None:
+        """Record one Gemini request."""
+        if (histogram := self.gemini_latency.get((model, outcome))) is None:
+            histogram = self.gemini_latency[(model, outcome)] = Histogram(GEMINI_BUCKETS)
+        histogram.observe(seconds)
+
+    @callback
+    def async_add_valve_open(self, zone_name: str, seconds: float) -> None:
+        """Add to the time a zone's valve was open."""
+        self.valve_open_seconds[zone_name] = self.valve_open_seconds.get(zone_name, 0.0) + seconds
+
+    @callback
+    def async_count_cycle(self, zone_name: str) -> None:
+        """Count one watering cycle of a zone."""
+        self.watering_cycles[zone_name] = self.watering_cycles.get(zone_name, 0) + 1
+
+    @callback
+    def async_set_plant_count(self, zone_name: str, count: int) -> None:
+        """Set the number of plants of a zone."""
+        self.plants[zone_name] = count
+
+    def render(self) -> str:
+        """Return all metrics in the OpenMetrics text format."""
+        lines = [
+            f"# TYPE {PREFIX}_refresh_duration_seconds histogram",
+            f"# UNIT {PREFIX}_refresh_duration_seconds seconds",
+            f"# HELP {PREFIX}_refresh_duration_seconds Duration of the zone refreshes.",
+        ]
+        for zone_name, histogram in self.refresh_duration.items():
+            lines.extend(_histogram_lines(f"{PREFIX}_refresh_duration_seconds", {"zone": zone_name}, histogram))
+
+        lines += [
+            f"# TYPE {PREFIX}_gemini_requests counter",
+            f"# HELP {PREFIX}_gemini_requests Gemini requests by model and outcome.",
+        ]
+        for (model, outcome), histogram in self.gemini_latency.items():
+            lines.append(f"{PREFIX}_gemini_requests_total{{{_labels(model=model, outcome=outcome)}}} {histogram.count}")
+
+        lines += [
+            f"# TYPE {PREFIX}_gemini_latency_seconds histogram",
+            f"# UNIT {PREFIX}_gemini_latency_seconds seconds",
+            f"# HELP {PREFIX}_gemini_latency_seconds Latency of the Gemini requests.",
+        ]
+        for (model, outcome), histogram in self.gemini_latency.items():
+            lines.extend(
+                _histogram_lines(f"{PREFIX}_gemini_latency_seconds", {"model": model, "outcome": outcome}, histogram)
+            )
+
+        lines += [
+            f"# TYPE {PREFIX}_valve_open_seconds counter",
+            f"# UNIT {PREFIX}_valve_open_seconds seconds",
+            f"# HELP {PREFIX}_valve_open_seconds Time the smart watering switch kept the valve open.",
+        ]
+        for zone_name, seconds in self.valve_open_seconds.items():
+            lines.append(f"{PREFIX}_valve_open_seconds_total{{{_labels(zone=zone_name)}}} {seconds}")
+
+        lines += [
+            f"# TYPE {PREFIX}_watering_cycles counter",
+            f"# HELP {PREFIX}_watering_cycles Watering cycles run by the smart watering switch.",
+        ]
+        for zone_name, count in self.watering_cycles.items():
+            lines.append(f"{PREFIX}_watering_cycles_total{{{_labels(zone=zone_name)}}} {count}")
+
+        lines += [
+            f"# TYPE {PREFIX}_plants gauge",
+            f"# HELP {PREFIX}_plants Number of plants per zone.",
+        ]
+        for zone_name, count in self.plants.items():
+            lines.append(f"{PREFIX}_plants{{{_labels(zone=zone_name)}}} {count}")
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class FloraPlannerMetricsView(HomeAssistantView):
+    """Serve the metrics to Prometheus; needs a long-lived access token."""
+
+    url = f"/api/{DOMAIN}/metrics"
+    name = f"api:{DOMAIN}:metrics"
+
+    def __init__(self, metrics: FloraPlannerMetrics) -> None:
+        """Initialize the view."""
+        self._metrics = metrics
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Return the metrics."""
+        return web.Response(
+            body=self._metrics.render().encode(),
+            status=HTTPStatus.OK,
+            headers={"Content-Type": CONTENT_TYPE},
+        )
+
+
+@callback
+def async_get_metrics(hass: HomeAssistant) -> FloraPlannerMetrics:
+    """Return the metrics shared by all zones."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (metrics := domain_data.get(DATA_METRICS)) is None:
+        metrics = domain_data[DATA_METRICS] = FloraPlannerMetrics()
+    return metrics
+
+
+@callback
+def async_register_metrics_view(hass: HomeAssistant) -> None:
+    """Serve the shared metrics at /api/flora_planner/metrics."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    # Een view blijft geregistreerd tot Home Assistant stopt, ook na het unloaden van de zones
+    if domain_data.get(DATA_METRICS_VIEW):
+        return
+    domain_data[DATA_METRICS_VIEW] = True
+    hass.http.register_view(FloraPlannerMetricsView(async_get_metrics(hass)))
@@ -0,0 +1,39 @@
+"""Immutable coordinator results for Flora Planner."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import date
+
+from .schedule import ScheduledTask
+
+
+@dataclass(frozen=True, slots=True)
+class PlantStatus:
+    """Watering status of a single plant."""
+
+    due: bool
+    next_watering: date | None
+    moisture: float | None
+
+
+@dataclass(frozen=True, slots=True)
+class ZoneData:
+    """Result of one coordinator refresh.
+
+    Results compare by value, so the coordinator can skip notifying its
+    entities when a refresh produced the same result as the previous one.
+    """
+
+    day: date
+    watering_required: bool
+    # Plantnaam -> status, in de volgorde van de opties
+    plants: Mapping[str, PlantStatus]
+    # Taken van de komende PLAN_HORIZON_DAYS dagen, in tijdsvolgorde
+    plan: tuple[ScheduledTask, ...]
+    weekly_story: str
+
+    @property
+    def plant_watering_status(self) -> dict[str, bool]:
+        """Return the due flag of every plant."""
+        return {name: status.due for name, status in self.plants.items()}
@@ -0,0 +1,327 @@
+"""AI plant care profiles with a persistent LRU/TTL cache."""
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+import json
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import slugify
+
+from .const import DATA_PROFILE_CACHE, DOMAIN
+from .gemini import async_get_gemini_client
+from .instrumentation import CacheStats
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.plant_profiles"
+SAVE_DELAY = 30  # seconden
+
+PROFILE_CACHE_SIZE = 500
+PROFILE_BATCH_SIZE = 10  # planten per AI verzoek in batch modus
+PROFILE_TTL = 90 * 24 * 3600  # 90 dagen, in seconden
+
+MONTHS = [str(i) for i in range(1, 13)]
+
+
+def normalize_plant_name(plant_name: str) -> str:
+    """Normalize a plant name so 'Tomaat ' and 'tomaat' share a profile."""
+    return " ".join(plant_name.casefold().split())
+
+
+def plant_slug(plant_name: str) -> str:
+    """Return the part of the entity unique IDs that identifies a plant in its zone.
+
+    'Rode roos' and 'rode-roos' share a slug, so a zone can hold only one
+    of them.
+    """
+    return slugify(plant_name)
+
+
+def profile_prompt(plant_name: str, language: str) -> str:
+    """Prompt asking Gemini for the full care profile of a plant."""
+    advice_language = "het Nederlands" if language == "nl" else "het Engels"
+    return (
+        f"Voor de plant '{plant_name}', geef een JSON-object met: "
+        f"'watering_interval' (dagen), 'drought_tolerant' (boolean, true als plant alleen water nodig heeft bij hitte/droogte), "
+        f"'min_moisture' (percentage 0-100, standaard 20), 'feeding_interval' (dagen), "
+        f"'water_start_month' (1-12), 'water_end_month' (1-12), 'feed_start_month' (1-12), 'feed_end_month' (1-12), "
+        f"'pruning_month' (1-12), 'sowing_month' (1-12, 0 als nvt), 'harvesting_month' (1-12, 0 als nvt), "
+        f"en 'advice' (een duidelijke uitleg in {advice_language} over: waterbehoefte, "
+        f"waarom deze vochtigheid, signalen van te veel/weinig water, en specifieke momenten voor extra voeding). "
+        f"Geef alleen de JSON string terug zonder markdown opmaak."
+    )
+
+
+def profiles_prompt(plant_names: list[str], language: str) -> str:
+    """Prompt asking Gemini for the care profiles of several plants at once."""
+    advice_language = "het Nederlands" if language == "nl" else "het Engels"
+    names = ", ".join(f"'{name}'" for name in plant_names)
+    return (
+        f"Geef voor elk van de planten {names} een JSON-object met: "
+        f"'plant_name' (exact de naam zoals hier gegeven), "
+        f"'watering_interval' (dagen), 'drought_tolerant' (boolean, true als plant alleen water nodig heeft bij hitte/droogte), "
+        f"'min_moisture' (percentage 0-100, standaard 20), 'feeding_interval' (dagen), "
+        f"'water_start_month' (1-12), 'water_end_month' (1-12), 'feed_start_month' (1-12), 'feed_end_month' (1-12), "
+        f"'pruning_month' (1-12), 'sowing_month' (1-12, 0 als nvt), 'harvesting_month' (1-12, 0 als nvt), "
+        f"en 'advice' (een korte uitleg in {advice_language} over waterbehoefte en voeding). "
+        f"Geef alleen een JSON array met deze objecten terug, zonder markdown opmaak."
+    )
+
+
+def parse_ai_json(text: str) -> Any:
+    """Parse a JSON answer from Gemini, with or without markdown code block."""
+    clean_text = text.strip().replace("```json", "").replace("```", "")
+    return json.loads(clean_text)
+
+
+def sanitize_profile(data: dict[str, Any]) -> dict[str, Any]:
+    """Apply the sanity checks to an AI answer, falling back to defaults."""
+    # --- Sanity Check (Geloofwaardigheidscheck) ---
+    # We controleren of de waarden logisch zijn. Zo niet, vallen we terug op defaults.
+
+    water = data.get("watering_interval", 7)
+    if not isinstance(water, int) or water < 1 or water > 60:
+        water = 7 # Fallback: 1 week
+
+    feed = data.get("feeding_interval", 30)
+    if not isinstance(feed, int) or feed < 1 or feed > 365:
+        feed = 30 # Fallback: 1 maand
+
+    prune = str(data.get("pruning_month", 6))
+    if prune not in MONTHS:
+        prune = "1" # Fallback: Januari
+
+    sow = str(data.get("sowing_month", 0))
+    if sow not in MONTHS:
+        sow = "0"
+
+    harvest = str(data.get("harvesting_month", 0))
+    if harvest not in MONTHS:
+        harvest = "0"
+
+    min_moist = data.get("min_moisture", 20)
+    if not isinstance(min_moist, int) or min_moist < 0 or min_moist > 100:
+        min_moist = 20
+
+    drought_only = data.get("drought_tolerant", False)
+    if not isinstance(drought_only, bool):
+        drought_only = False
+
+    def month(key: str, default: int) -> int:
+        value = str(data.get(key, default))
+        return int(value) if value in MONTHS else default
+
+    profile = {
+        "watering_interval": water,
+        "feeding_interval": feed,
+        "pruning_month": int(prune),
+        "sowing_month": int(sow),
+        "harvesting_month": int(harvest),
+        "min_moisture": min_moist,
+        "drought_tolerant": drought_only,
+        "water_start_month": month("water_start_month", 1),
+        "water_end_month": month("water_end_month", 12),
+        "feed_start_month": month("feed_start_month", 3),
+        "feed_end_month": month("feed_end_month", 10),
+    }
+    if isinstance(advice := data.get("advice"), str) and advice:
+        profile["advice"] = advice
+    return profile
+
+
+class PlantProfileCache:
+    """Size-bounded, persistent cache of sanitized plant profiles.
+
+    Profiles are keyed on the normalized plant name and the language, the
+    least recently used profile is dropped when the cache is full and
+    profiles expire after PROFILE_TTL.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._profiles: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self.stats = CacheStats()
+        self._load_lock = asyncio.Lock()
+        self._loaded = False
+
+    async def async_load(self) -> None:
+        """Load the persisted profiles, once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            if data := await self._store.async_load():
+                # Opgeslagen in LRU volgorde, oudste eerst
+                self._profiles = OrderedDict(
+                    (entry["key"], entry) for entry in data.get("profiles", [])
+                )
+            self._loaded = True
+
+    @staticmethod
+    def make_key(plant_name: str, language: str) -> str:
+        """Build the cache key for a plant."""
+        return f"{language}:{normalize_plant_name(plant_name)}"
+
+    @callback
+    def async_get(self, plant_name: str, language: str) -> dict[str, Any] | None:
+        """Return a cached profile, or None if it is missing or expired."""
+        key = self.make_key(plant_name, language)
+        if (entry := self._profiles.get(key)) is None:
+            self.stats.async_hit(False)
+            return None
+        if time.time() - entry["stored"] > PROFILE_TTL:
+            del self._profiles[key]
+            self._async_schedule_save()
+            self.stats.async_hit(False)
+            return None
+        self.stats.async_hit(True)
+        self._profiles.move_to_end(key)
+        return dict(entry["profile"])
+
+    @callback
+    def async_set(self, plant_name: str, language: str, profile: dict[str, Any]) -> None:
+        """Store a sanitized profile."""
+        key = self.make_key(plant_name, language)
+        self._profiles[key] = {"key": key, "stored": time.time(), "profile": profile}
+        self._profiles.move_to_end(key)
+        while len(self._profiles) > PROFILE_CACHE_SIZE:
+            self._profiles.popitem(last=False)
+        self._async_schedule_save()
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Write the cache to disk, batched."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        return {"profiles": list(self._profiles.values())}
+
+
+async def async_get_profile_cache(hass: HomeAssistant) -> PlantProfileCache:
+    """Return the profile cache shared by all zones."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (cache := domain_data.get(DATA_PROFILE_CACHE)) is None:
+        cache = domain_data[DATA_PROFILE_CACHE] = PlantProfileCache(hass)
+    await cache.async_load()
+    return cache
+
+
+async def async_get_plant_profile(
+    hass: HomeAssistant, api_key: str, plant_name: str
+) -> dict[str, Any]:
+    """Return the care profile of a plant, from the cache or from Gemini.
+
+    Raises GeminiError if Gemini can't be reached and ValueError if its
+    answer is not a JSON object.
+    """
+    language = hass.config.language
+    cache = await async_get_profile_cache(hass)
+    if (profile := cache.async_get(plant_name, language)) is not None:
+        _LOGGER.debug(f"Profiel voor {plant_name} uit de cache")
+        return profile
+
+    text = await async_get_gemini_client(hass, api_key).async_generate(
+        profile_prompt(plant_name, language)
+    )
+    data = parse_ai_json(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"Geen JSON-object ontvangen voor {plant_name}")
+
+    profile = sanitize_profile(data)
+    cache.async_set(plant_name, language, profile)
+    return dict(profile)
+
+
+async def async_get_plant_profiles(
+    hass: HomeAssistant,
+    api_key: str,
+    plant_names: list[str],
+    batch_size: int = PROFILE_BATCH_SIZE,
+    semaphore: asyncio.Semaphore | None = None,
+) -> dict[str, dict[str, Any] | Exception]:
+    """Return the care profiles of several plants, asking Gemini in batches.
+
+    Plants that are not cached are requested batch_size at a time in one
+    prompt. Plants missing from a batch answer, or with a malformed entry,
+    fall back to a single-plant request. The result maps every requested
+    name to its profile or to the exception that prevented it.
+    """
+    language = hass.config.language
+    cache = await async_get_profile_cache(hass)
+    semaphore = semaphore or asyncio.Semaphore(1)
+
+    results: dict[str, dict[str, Any] | Exception] = {}
+    # Eén verzoek per genormaliseerde naam, ook als de lijst dubbele namen bevat
+    missing: dict[str, list[str]] = {}
+    for plant_name in plant_names:
+        if (profile := cache.async_get(plant_name, language)) is not None:
+            results[plant_name] = profile
+        else:
+            missing.setdefault(normalize_plant_name(plant_name), []).append(plant_name)
+
+    async def async_single(names: list[str]) -> None:
+        """Request one plant on its own."""
+        try:
+            async with semaphore:
+                profile = await async_get_plant_profile(hass, api_key, names[0])
+        except Exception as err:  # noqa: BLE001 - per plant gerapporteerd
+            for name in names:
+                results[name] = err
+            return
+        for name in names:
+            results[name] = dict(profile)
+
+    async def async_batch(batch: list[list[str]]) -> None:
+        """Request a batch of plants in one prompt."""
+        try:
+            async with semaphore:
+                text = await async_get_gemini_client(hass, api_key).async_generate(
+                    profiles_prompt([names[0] for names in batch], language)
+                )
+        except Exception as err:  # noqa: BLE001 - per plant gerapporteerd
+            for names in batch:
+                for name in names:
+                    results[name] = err
+            return
+
+        answers: dict[str, dict[str, Any]] = {}
+        try:
+            data = parse_ai_json(text)
+        except ValueError:
+            _LOGGER.debug("Batch antwoord van Gemini is geen geldige JSON")
+            data = None
+        if isinstance(data, list):
+            for item in data:
+                if isinstance(item, dict) and isinstance(item.get("plant_name"), str):
+                    answers[normalize_plant_name(item["plant_name"])] = item
+
+        fallback = []
+        for names in batch:
+            if (item := answers.get(normalize_plant_name(names[0]))) is None:
+                fallback.append(names)
+                continue
+            profile = sanitize_profile(item)
+            cache.async_set(names[0], language, profile)
+            for name in names:
+                results[name] = dict(profile)
+
+        if fallback:
+            _LOGGER.debug(f"{len(fallback)} planten ontbraken in het batch antwoord, los opvragen")
+            await asyncio.gather(*(async_single(names) for names in fallback))
+
+    groups = list(missing.values())
+    if batch_size <= 1:
+        await asyncio.gather(*(async_single(names) for names in groups))
+    else:
+        await asyncio.gather(
+            *(async_batch(groups[i : i + batch_size]) for i in range(0, len(groups), batch_size))
+        )
+    return results
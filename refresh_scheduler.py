@@ -0,0 +1,117 @@
+"""Refresh scheduler shared by the coordinators of all zones."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+import logging
+import math
+import zlib
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DATA_REFRESH_SCHEDULER,
+    DOMAIN,
+    MAX_CONCURRENT_REFRESHES,
+    SAFETY_REFRESH_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def zone_jitter(entry_id: str) -> float:
+    """Return a fraction in [0, 1) that stays the same for a zone across restarts."""
+    # hash() verschilt per proces, crc32 niet
+    return zlib.crc32(entry_id.encode()) / 2**32
+
+
+class RefreshScheduler:
+    """Spreads the periodic refreshes of all zones evenly over the interval.
+
+    Every zone gets its own slot of interval / zones, with a fixed jitter in
+    the first half of that slot. The slots are aligned to the clock instead
+    of to the moment of setup, so after a restart the zones keep their place
+    rather than all refreshing together. On top of that a semaphore caps the
+    number of refreshes running at once, whatever triggered them.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        interval: timedelta = SAFETY_REFRESH_INTERVAL,
+        max_concurrent: int = MAX_CONCURRENT_REFRESHES,
+    ) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self.interval = interval
+        # Zones houden een slot vast zolang hun refresh loopt
+        self.slots = asyncio.Semaphore(max_concurrent)
+        self._zones: dict[str, Callable[[], Awaitable[None]]] = {}
+        self._unsub_timers: dict[str, CALLBACK_TYPE] = {}
+
+    def offset(self, entry_id: str) -> timedelta:
+        """Return when in every interval a registered zone refreshes."""
+        zones = sorted(self._zones)
+        slot = self.interval / len(zones)
+        return slot * (zones.index(entry_id) + zone_jitter(entry_id) / 2)
+
+    def next_refresh(self, entry_id: str, now: datetime) -> datetime:
+        """Return the first refresh time of a registered zone after now."""
+        period = self.interval.total_seconds()
+        offset = self.offset(entry_id).total_seconds()
+        cycle = math.floor((now.timestamp() - offset) / period) + 1
+        return dt_util.utc_from_timestamp(cycle * period + offset)
+
+    @callback
+    def async_register(self, entry_id: str, refresh: Callable[[], Awaitable[None]]) -> CALLBACK_TYPE:
+        """Refresh a zone periodically in its own slot; returns the unregister callback."""
+        self._zones[entry_id] = refresh
+        # Een zone erbij verschuift de slots van alle zones
+        self._async_schedule_all()
+
+        @callback
+        def unregister() -> None:
+            if self._zones.pop(entry_id, None) is None:
+                return
+            if unsub := self._unsub_timers.pop(entry_id, None):
+                unsub()
+            self._async_schedule_all()
+
+        return unregister
+
+    @callback
+    def _async_schedule_all(self) -> None:
+        """(Re)plan the next refresh of every zone."""
+        for entry_id in self._zones:
+            self._async_schedule(entry_id)
+
+    @callback
+    def _async_schedule(self, entry_id: str, after: datetime | None = None) -> None:
+        """Plan the next refresh of a zone, after the given time if that is later than now."""
+        if unsub := self._unsub_timers.pop(entry_id, None):
+            unsub()
+        now = dt_util.utcnow()
+        when = self.next_refresh(entry_id, max(now, after) if after else now)
+        _LOGGER.debug(f"Volgende refresh van {entry_id} om {when.isoformat()}")
+
+        @callback
+        def fire(now: datetime) -> None:
+            self._unsub_timers.pop(entry_id, None)
+            if (refresh := self._zones.get(entry_id)) is None:
+                return
+            self.hass.async_create_task(refresh())
+            self._async_schedule(entry_id, when)
+
+        self._unsub_timers[entry_id] = async_track_point_in_utc_time(self.hass, fire, when)
+
+
+@callback
+def async_get_refresh_scheduler(hass: HomeAssistant) -> RefreshScheduler:
+    """Return the refresh scheduler shared by all zones."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (scheduler := domain_data.get(DATA_REFRESH_SCHEDULER)) is None:
+        scheduler = domain_data[DATA_REFRESH_SCHEDULER] = RefreshScheduler(hass)
+    return scheduler
@@ -0,0 +1,79 @@
+"""Runtime schedule state for a Flora Planner zone."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import date, datetime
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10  # seconden
+
+
+class ZoneRuntimeState:
+    """State that changes while the zone runs (anchor resets, last watered).
+
+    This used to be written into the config entry options, but every options
+    write reloads the whole integration. A Store write does not.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the runtime state."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.runtime"
+        )
+        # Plantnaam -> ISO datum/tijd
+        self.anchors: dict[str, str] = {}
+        self.last_watered: dict[str, str] = {}
+
+    async def async_load(self) -> None:
+        """Load the persisted state."""
+        if data := await self._store.async_load():
+            self.anchors = data.get("anchors", {})
+            self.last_watered = data.get("last_watered", {})
+
+    async def async_remove(self) -> None:
+        """Remove the persisted state when the zone is deleted."""
+        await self._store.async_remove()
+
+    @callback
+    def async_set_anchor(self, plant_name: str, day: date) -> None:
+        """Record a new anchor date for a plant (e.g. after rain)."""
+        self.anchors[plant_name] = day.isoformat()
+        self._async_schedule_save()
+
+    @callback
+    def async_set_last_watered(self, plant_names: Iterable[str], when: datetime) -> None:
+        """Record when plants were last watered."""
+        stamp = when.isoformat()
+        for plant_name in plant_names:
+            self.last_watered[plant_name] = stamp
+        self._async_schedule_save()
+
+    async def async_prune(self, plant_names: Iterable[str]) -> None:
+        """Forget the state of all plants except the given ones.
+
+        Writes right away, so a reload that follows reads the pruned state.
+        """
+        keep = set(plant_names)
+        changed = False
+        for mapping in (self.anchors, self.last_watered):
+            for plant_name in [name for name in mapping if name not in keep]:
+                del mapping[plant_name]
+                changed = True
+        if changed:
+            await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Write the state to disk, batched."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        return {"anchors": self.anchors, "last_watered": self.last_watered}
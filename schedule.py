@@ -0,0 +1,262 @@
+"""Schedule helpers and compiled plant index for Flora Planner."""
+from __future__ import annotations
+
+from collections.abc import Collection, Iterable, Iterator, Mapping
+from datetime import date, timedelta
+import heapq
+from itertools import islice
+from typing import Any, NamedTuple
+
+from .const import (
+    CONF_ANCHOR_DATE,
+    CONF_AUTO_WATER,
+    CONF_DROUGHT_ONLY,
+    CONF_FEED_END_MONTH,
+    CONF_FEED_INTERVAL,
+    CONF_FEED_START_MONTH,
+    CONF_HARVEST_MONTH,
+    CONF_MIN_MOISTURE,
+    CONF_PLANT_NAME,
+    CONF_PRUNE_MONTH,
+    CONF_SOIL_MOISTURE_ENTITY,
+    CONF_SOW_MONTH,
+    CONF_WATER_END_MONTH,
+    CONF_WATER_INTERVAL,
+    CONF_WATER_START_MONTH,
+    EVENT_FEED,
+    EVENT_HARVEST,
+    EVENT_PRUNE,
+    EVENT_SOW,
+    EVENT_WATER,
+    REASON_SCHEDULE,
+    SOIL_MOISTURE_THRESHOLD,
+)
+
+# Zo lang zoeken we naar een datum binnen het seizoen voordat we opgeven
+SEASON_SEARCH_YEARS = 10
+
+
+def interval_dates(
+    anchor: date, interval: int, start: date, end: date | None = None
+) -> Iterator[date]:
+    """Yield every date in [start, end] that falls on the interval from anchor.
+
+    Instead of testing every day in the range we jump straight to the first
+    occurrence and step by the interval, so the cost is proportional to the
+    number of occurrences. Without an end the dates never run out.
+    """
+    if interval < 1:
+        return
+
+    first = max(start, anchor)
+    offset = (first - anchor).days % interval
+    if offset:
+        first += timedelta(days=interval - offset)
+
+    step = timedelta(days=interval)
+    current = first
+    while end is None or current <= end:
+        yield current
+        current += step
+
+
+def yearly_dates(month: int, start: date, end: date | None = None) -> Iterator[date]:
+    """Yield the first day of the given month for every year in [start, end]."""
+    if not 1 <= month <= 12:
+        return
+
+    year = start.year
+    if date(year, month, 1) < start:
+        year += 1
+
+    while end is None or date(year, month, 1) <= end:
+        yield date(year, month, 1)
+        year += 1
+
+
+def seasonal_dates(dates: Iterable[date], season: tuple[bool, ...]) -> Iterator[date]:
+    """Keep the dates whose month is in season (a table from _season_table).
+
+    An interval can keep missing its season, e.g. a yearly interval that
+    always lands outside it; an open series then stops after
+    SEASON_SEARCH_YEARS without a date in season instead of running forever.
+    """
+    missed_since: date | None = None
+    for day in dates:
+        if season[day.month]:
+            missed_since = None
+            yield day
+        elif missed_since is None:
+            missed_since = day
+        elif day.year - missed_since.year > SEASON_SEARCH_YEARS:
+            return
+
+
+def in_season(month: int, start: int, end: int) -> bool:
+    """Return True if month lies in the (possibly year-wrapping) season."""
+    if start <= end:
+        return start <= month <= end
+    # Loopt door over jaarwisseling (bijv. Nov-Feb)
+    return month >= start or month <= end
+
+
+def _season_table(start: int, end: int) -> tuple[bool, ...]:
+    """Pre-compute the season check for every month (index 0 is unused)."""
+    return (False,) + tuple(in_season(month, start, end) for month in range(1, 13))
+
+
+class CompiledPlant:
+    """A plant from the zone options with all values parsed once."""
+
+    __slots__ = (
+        "name",
+        "anchor",
+        "anchor_ordinal",
+        "water_interval",
+        "feed_interval",
+        "water_season",
+        "feed_season",
+        "prune_month",
+        "sow_month",
+        "harvest_month",
+        "soil_entity",
+        "min_moisture",
+        "drought_only",
+        "auto_water",
+    )
+
+    def __init__(self, plant: dict[str, Any], anchor_override: str | None = None) -> None:
+        """Parse a raw plant dict from the config entry options.
+
+        anchor_override is a runtime anchor (see ZoneRuntimeState); the
+        later of it and the configured anchor date wins. Runtime anchors are
+        dropped when the options of a plant change, so an edited anchor
+        date always applies.
+        """
+        self.name: str = plant[CONF_PLANT_NAME]
+        anchor = date.fromisoformat(plant[CONF_ANCHOR_DATE])
+        if anchor_override is not None:
+            anchor = max(anchor, date.fromisoformat(anchor_override))
+        self.set_anchor(anchor)
+        self.water_interval: int = int(plant[CONF_WATER_INTERVAL])
+        self.feed_interval: int = int(plant[CONF_FEED_INTERVAL])
+        self.water_season: tuple[bool, ...] = _season_table(
+            int(plant.get(CONF_WATER_START_MONTH, 1)),
+            int(plant.get(CONF_WATER_END_MONTH, 12)),
+        )
+        self.feed_season: tuple[bool, ...] = _season_table(
+            int(plant.get(CONF_FEED_START_MONTH, 3)),
+            int(plant.get(CONF_FEED_END_MONTH, 10)),
+        )
+        self.prune_month: int = int(plant.get(CONF_PRUNE_MONTH, 0))
+        self.sow_month: int = int(plant.get(CONF_SOW_MONTH, 0))
+        self.harvest_month: int = int(plant.get(CONF_HARVEST_MONTH, 0))
+        self.soil_entity: str | None = plant.get(CONF_SOIL_MOISTURE_ENTITY) or None
+        self.min_moisture: float = plant.get(CONF_MIN_MOISTURE, SOIL_MOISTURE_THRESHOLD)
+        self.drought_only: bool = bool(plant.get(CONF_DROUGHT_ONLY, False))
+        self.auto_water: bool = bool(plant.get(CONF_AUTO_WATER, True))
+
+    def set_anchor(self, anchor: date) -> None:
+        """Move the anchor date the interval tasks are counted from."""
+        self.anchor = anchor
+        self.anchor_ordinal = anchor.toordinal()
+
+
+def compile_plants(
+    plants: list[dict[str, Any]], anchors: Mapping[str, str] | None = None
+) -> tuple[CompiledPlant, ...]:
+    """Compile the raw plant option dicts of a zone."""
+    anchors = anchors or {}
+    return tuple(
+        CompiledPlant(plant, anchors.get(plant[CONF_PLANT_NAME])) for plant in plants
+    )
+
+
+class ScheduledTask(NamedTuple):
+    """One task for one plant on one day; tuples sort by day first.
+
+    reason tells why the task is planned: the schedule itself, or a live
+    reading of the coordinator (see FloraPlannerCoordinator._build_plan).
+    """
+
+    day: date
+    kind: str
+    plant: str
+    reason: str = REASON_SCHEDULE
+
+
+def _task_stream(dates: Iterable[date], kind: str, plant_name: str) -> Iterator[ScheduledTask]:
+    """Wrap a date series of one task of one plant."""
+    for day in dates:
+        yield ScheduledTask(day, kind, plant_name)
+
+
+def plant_task_streams(
+    plant: CompiledPlant,
+    start: date,
+    end: date | None = None,
+    kinds: Collection[str] | None = None,
+) -> list[Iterator[ScheduledTask]]:
+    """Return one date-ordered task stream per kind of task of a plant.
+
+    Water and feed tasks only fall in their season.
+    """
+    # Taken vallen pas vanaf de ankerdatum
+    first = max(start, plant.anchor)
+    series = (
+        (
+            EVENT_WATER,
+            seasonal_dates(interval_dates(plant.anchor, plant.water_interval, first, end), plant.water_season),
+        ),
+        (
+            EVENT_FEED,
+            seasonal_dates(interval_dates(plant.anchor, plant.feed_interval, first, end), plant.feed_season),
+        ),
+        (EVENT_PRUNE, yearly_dates(plant.prune_month, first, end)),
+        (EVENT_SOW, yearly_dates(plant.sow_month, first, end)),
+        (EVENT_HARVEST, yearly_dates(plant.harvest_month, first, end)),
+    )
+    return [
+        _task_stream(dates, kind, plant.name)
+        for kind, dates in series
+        if kinds is None or kind in kinds
+    ]
+
+
+def iter_tasks(
+    plants: Iterable[CompiledPlant],
+    start: date,
+    end: date | None = None,
+    kinds: Collection[str] | None = None,
+) -> Iterator[ScheduledTask]:
+    """Yield the tasks of all plants from start on, in time order.
+
+    Every stream is already sorted, so a heap merge only ever holds the next
+    task of each stream: taking the first n tasks costs O(n log k) for k
+    streams instead of generating and sorting the whole range. Without an
+    end the stream is unbounded; stop consuming it when you have enough.
+    """
+    return heapq.merge(
+        *(
+            stream
+            for plant in plants
+            for stream in plant_task_streams(plant, start, end, kinds)
+        )
+    )
+
+
+def next_tasks(
+    plants: Iterable[CompiledPlant],
+    start: date,
+    count: int,
+    kinds: Collection[str] | None = None,
+) -> list[ScheduledTask]:
+    """Return the first count tasks on or after start."""
+    return list(islice(iter_tasks(plants, start, kinds=kinds), count))
+
+
+def first_task(
+    plants: Iterable[CompiledPlant], start: date, kind: str | None = None
+) -> ScheduledTask | None:
+    """Return the first task (of one kind, if given) on or after start."""
+    return next(iter_tasks(plants, start, kinds=None if kind is None else (kind,)), None)
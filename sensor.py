@@ -1,13 +1,26 @@
 """Sensor platform for Flora Planner."""
+from datetime import date
 from typing import Any
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN, SensorDeviceClass, SensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, CONF_ZONE_NAME, ATTR_WEEKLY_STORY, CONF_PLANTS
-from . import FloraPlannerCoordinator
+from .const import (
+    DOMAIN,
+    CONF_ZONE_NAME,
+    CONF_PLANT_ENTITIES,
+    ATTR_NEXT_WATERING,
+)
+from . import FloraPlannerCoordinator, zone_setting
+from .models import ZoneData
+from .entity import (
+    FloraPlannerPlantEntity,
+    async_remove_plant_entities,
+    async_setup_plant_entities,
+    zone_device_info,
+)
 
 
 async def async_setup_entry(
@@ -18,16 +31,26 @@ async def async_setup_entry(
     """Set up the Flora Planner sensor platform."""
     coordinator: FloraPlannerCoordinator = hass.data[DOMAIN][config_entry.entry_id]
     
-    async_add_entities(
-        [WeeklyStorySensor(coordinator, config_entry)],
-        update_before_add=True,
-    )
+    zone_entities = [WeeklyStorySensor(coordinator, config_entry)]
+    async_add_entities(zone_entities, update_before_add=True)
+
+    if zone_setting(config_entry, CONF_PLANT_ENTITIES, False):
+        async_setup_plant_entities(
+            coordinator,
+            config_entry,
+            async_add_entities,
+            lambda plant_name: [PlantNextWateringSensor(coordinator, config_entry, plant_name)],
+        )
+    else:
+        async_remove_plant_entities(hass, config_entry, SENSOR_DOMAIN, zone_entities)
 
 
 class WeeklyStorySensor(CoordinatorEntity, SensorEntity):
     """A sensor that provides a weekly, AI-generated story for garden tasks."""
 
     _attr_icon = "mdi:book-open-page-variant"
+    # Groot en alleen nuttig voor het dashboard; niet in de database
+    _unrecorded_attributes = frozenset({"full_story", "planned_tasks", "planten_lijst"})
 
     def __init__(self, coordinator: FloraPlannerCoordinator, config_entry: ConfigEntry):
         """Initialize the sensor."""
@@ -35,39 +58,82 @@ class WeeklyStorySensor(CoordinatorEntity, SensorEntity):
         self._zone_name = config_entry.data[CONF_ZONE_NAME]
         self._attr_name = f"Flora Planner {self._zone_name} Weekly Story"
         self._attr_unique_id = f"{config_entry.entry_id}_weekly_story"
+        self._attr_device_info = zone_device_info(config_entry)
+        # Met losse plant entiteiten is de lijst met planten overbodig
+        self._plant_list = not zone_setting(config_entry, CONF_PLANT_ENTITIES, False)
+        # Attributen worden per coordinator resultaat en plantversie één keer opgebouwd;
+        # de plantgegevens zelf zitten niet in het resultaat
+        self._attributes_key: tuple[ZoneData | None, int] | None = None
+        self._attributes: dict[str, Any] = {}
 
     @property
     def native_value(self) -> str:
         """Return the state of the sensor."""
         if self.coordinator.data:
-            story = self.coordinator.data.get(ATTR_WEEKLY_STORY)
+            story = self.coordinator.data.weekly_story
             return "Beschikbaar" if story else "Geen verhaal"
         return "Wachten op data..."
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return the state attributes."""
+        data = self.coordinator.data
+        version = self.coordinator.schedule_version
+        if self._attributes_key is not None:
+            cached_data, cached_version = self._attributes_key
+            if data is cached_data and version == cached_version:
+                return self._attributes
+
         attributes = {}
-        if self.coordinator.data:
-            attributes["full_story"] = self.coordinator.data.get(ATTR_WEEKLY_STORY, "Nog geen verhaal gegenereerd.")
-            
-            # Voeg details van alle planten toe zodat je ze op het dashboard kunt zien
-            plants = self.coordinator.config_entry.options.get(CONF_PLANTS, [])
-            plant_details = []
-            for plant in plants:
-                detail = {
-                    "naam": plant.get("plant_name"),
-                    "water_interval": plant.get("watering_interval"),
-                    "min_vochtigheid": plant.get("min_moisture"),
-                    "bodem_sensor": plant.get("soil_moisture_entity"),
-                    "huidige_vochtigheid": "Onbekend"
-                }
-                if detail["bodem_sensor"]:
-                    state = self.hass.states.get(detail["bodem_sensor"])
-                    if state:
-                        detail["huidige_vochtigheid"] = state.state
-                plant_details.append(detail)
-            
-            attributes["planten_lijst"] = plant_details
+        if data:
+            attributes["full_story"] = data.weekly_story or "Nog geen verhaal gegenereerd."
+            # Dezelfde taken waar het verhaal over gaat
+            attributes["planned_tasks"] = [
+                {"date": task.day.isoformat(), "plant": task.plant, "task": task.kind, "reason": task.reason}
+                for task in data.plan
+            ]
             
+            if self._plant_list:
+                # Voeg details van alle planten toe zodat je ze op het dashboard kunt zien
+                plant_details = []
+                for plant in self.coordinator.plants:
+                    status = data.plants.get(plant.name)
+                    moisture = status.moisture if status else None
+                    plant_details.append({
+                        "naam": plant.name,
+                        "water_interval": plant.water_interval,
+                        "min_vochtigheid": plant.min_moisture,
+                        "bodem_sensor": plant.soil_entity,
+                        "huidige_vochtigheid": "Onbekend" if moisture is None else moisture,
+                    })
+                attributes["planten_lijst"] = plant_details
+
+        self._attributes_key = (data, version)
+        self._attributes = attributes
         return attributes
+
+
+class PlantNextWateringSensor(FloraPlannerPlantEntity, SensorEntity):
+    """The next watering date of a single plant, with its current moisture."""
+
+    _attr_icon = "mdi:watering-can"
+    _attr_device_class = SensorDeviceClass.DATE
+
+    def __init__(self, coordinator: FloraPlannerCoordinator, config_entry: ConfigEntry, plant_name: str):
+        """Initialize the sensor."""
+        super().__init__(coordinator, config_entry, plant_name, ATTR_NEXT_WATERING)
+        self._attr_name = f"Flora Planner {self._zone_name} {plant_name} Next Watering"
+
+    @property
+    def native_value(self) -> date | None:
+        """Return the next day the plant needs water."""
+        if status := self._status:
+            return status.next_watering
+        return None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the current soil moisture of the plant."""
+        if status := self._status:
+            return {"moisture": status.moisture}
+        return {}
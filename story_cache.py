@@ -0,0 +1,101 @@
+"""Persistent cache for the AI generated weekly stories."""
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+import hashlib
+import json
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_STORY_CACHE, DOMAIN
+from .instrumentation import CacheStats
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.story_cache"
+SAVE_DELAY = 30  # seconden
+
+
+def _iso_week(day: date) -> str:
+    """Return the ISO week of a day, e.g. '2024-W07'."""
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class StoryCache:
+    """Weekly stories keyed on their inputs, persisted across restarts.
+
+    A story only depends on the set of tasks, the language and the week it
+    was written for. As long as those are the same we can reuse the story
+    instead of asking Gemini for a new one every refresh.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._stories: dict[str, dict[str, str]] = {}
+        self.stats = CacheStats()
+        self._load_lock = asyncio.Lock()
+        self._loaded = False
+
+    async def async_load(self) -> None:
+        """Load the persisted stories, once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            data = await self._store.async_load()
+            if data:
+                self._stories = data.get("stories", {})
+            self._loaded = True
+        self.async_evict_expired(dt_util.now().date())
+
+    @staticmethod
+    def make_key(tasks: list[str], language: str, day: date) -> str:
+        """Build the content address for a set of tasks."""
+        raw = json.dumps([sorted(set(tasks)), language, _iso_week(day)], ensure_ascii=False)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @callback
+    def async_get(self, key: str) -> str | None:
+        """Return the cached story for a key, if any."""
+        entry = self._stories.get(key)
+        self.stats.async_hit(entry is not None)
+        return entry["story"] if entry is not None else None
+
+    @callback
+    def async_set(self, key: str, story: str, day: date) -> None:
+        """Store a freshly generated story."""
+        self._stories[key] = {"story": story, "week": _iso_week(day)}
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_evict_expired(self, day: date) -> None:
+        """Drop stories that were written for an earlier week."""
+        week = _iso_week(day)
+        expired = [key for key, entry in self._stories.items() if entry["week"] != week]
+        if not expired:
+            return
+        for key in expired:
+            del self._stories[key]
+        _LOGGER.debug(f"{len(expired)} verlopen verhalen uit de cache verwijderd")
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        return {"stories": self._stories}
+
+
+async def async_get_story_cache(hass: HomeAssistant) -> StoryCache:
+    """Return the story cache shared by all zones."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (cache := domain_data.get(DATA_STORY_CACHE)) is None:
+        cache = domain_data[DATA_STORY_CACHE] = StoryCache(hass)
+    await cache.async_load()
+    return cache
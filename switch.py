@@ -1,13 +1,20 @@
 """Switch platform for Flora Planner Smart Watering."""
 import asyncio
+from collections.abc import Callable, Coroutine
+from datetime import datetime
+from enum import StrEnum
+from functools import partial
 import logging
+import time
 from typing import Any
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 from homeassistant.const import (
     SERVICE_TURN_ON,
     SERVICE_TURN_OFF,
@@ -22,13 +29,16 @@ from .const import (
     CONF_CYCLE_MINUTES,
     CONF_SOAK_MINUTES,
     CONF_MAX_CYCLES,
-    CONF_PLANTS,
-    CONF_SOIL_MOISTURE_ENTITY,
-    CONF_MIN_MOISTURE,
-    CONF_AUTO_WATER,
-    SOIL_MOISTURE_THRESHOLD,
+    CONF_MOISTURE_HYSTERESIS,
+    DEFAULT_MOISTURE_HYSTERESIS,
+    CONF_MAX_CONCURRENT_VALVES,
+    DEFAULT_MAX_CONCURRENT_VALVES,
+    ATTR_LAST_WATERED,
 )
-from . import FloraPlannerCoordinator
+from . import FloraPlannerCoordinator, zone_setting
+from .entity import zone_device_info
+from .metrics import async_get_metrics
+from .watering_scheduler import async_get_valve_scheduler
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -42,11 +52,27 @@ async def async_setup_entry(
     
     # Alleen toevoegen als er een sproeier is geconfigureerd
     if config_entry.data.get(CONF_SPRINKLER_ENTITY):
+        # Alle zones delen de kleppen; de strengste limiet geldt
+        config_entry.async_on_unload(
+            async_get_valve_scheduler(hass).async_set_limit(
+                config_entry.entry_id,
+                zone_setting(config_entry, CONF_MAX_CONCURRENT_VALVES, DEFAULT_MAX_CONCURRENT_VALVES),
+            )
+        )
         async_add_entities(
             [FloraPlannerSmartWateringSwitch(coordinator, config_entry)],
             update_before_add=True,
         )
 
+class WateringPhase(StrEnum):
+    """Phase of a cycle & soak run."""
+
+    IDLE = "idle"
+    WAITING = "waiting"
+    WATERING = "watering"
+    SOAKING = "soaking"
+
+
 class FloraPlannerSmartWateringSwitch(CoordinatorEntity, SwitchEntity):
     """Smart watering switch that cycles the sprinkler based on moisture."""
 
@@ -60,91 +86,231 @@ class FloraPlannerSmartWateringSwitch(CoordinatorEntity, SwitchEntity):
         self._cycle_minutes = config_entry.data.get(CONF_CYCLE_MINUTES, 5)
         self._soak_minutes = config_entry.data.get(CONF_SOAK_MINUTES, 10)
         self._max_cycles = config_entry.data.get(CONF_MAX_CYCLES, 5)
+        self._hysteresis = zone_setting(config_entry, CONF_MOISTURE_HYSTERESIS, DEFAULT_MOISTURE_HYSTERESIS)
         
         self._attr_name = f"Flora Planner {self._zone_name} Smart Watering"
         self._attr_unique_id = f"{config_entry.entry_id}_smart_watering"
-        self._is_active = False
-        self._watering_task = None
+        self._attr_device_info = zone_device_info(config_entry)
+        # Toestandsmachine: de fases worden gestuurd door geplande callbacks
+        self._phase = WateringPhase.IDLE
+        self._cycle = 0
+        self._watered = False
+        self._stop_event = asyncio.Event()
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._unsub_moisture: CALLBACK_TYPE | None = None
+        self._release_valve: CALLBACK_TYPE | None = None
+        self._metrics = async_get_metrics(coordinator.hass)
+        # Monotone tijd waarop de sproeier aan ging, voor de metrics
+        self._valve_opened: float | None = None
 
     @property
     def is_on(self) -> bool:
         """Return true if the smart watering cycle is running."""
-        return self._is_active
+        return self._phase is not WateringPhase.IDLE
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the current phase and when the auto-watered plants last got water."""
+        last_watered = self.coordinator.runtime_state.last_watered
+        stamps = [
+            last_watered[plant.name]
+            for plant in self.coordinator.plants
+            if plant.auto_water and plant.name in last_watered
+        ]
+        return {
+            "phase": self._phase.value,
+            "cycle": self._cycle,
+            ATTR_LAST_WATERED: max(stamps) if stamps else None,
+        }
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Start the smart watering cycle."""
-        if self._is_active:
+        if self.is_on:
             return
-        
-        self._is_active = True
-        self.async_write_ha_state()
-        
-        # Start the background task
-        self._watering_task = self.hass.async_create_task(self._run_watering_cycle())
+
+        # Elke run krijgt een eigen event; oude callbacks kijken naar dat van hun run
+        stop = self._stop_event = asyncio.Event()
+        self._cycle = 0
+        self._watered = False
+        await self._async_start_cycle(stop)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Stop the smart watering cycle."""
-        self._is_active = False
-        if self._watering_task:
-            self._watering_task.cancel()
-            self._watering_task = None
-        
-        # Ensure sprinkler is off when we stop
-        await self._control_sprinkler(False)
+        if not self.is_on:
+            # Zorg er toch voor dat de sproeier uit staat
+            await self._control_sprinkler(False)
+            return
+        _LOGGER.info(f"Smart Watering {self._zone_name}: Geannuleerd.")
+        await self._async_finish()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop watering when the entity is removed."""
+        if self.is_on:
+            await self._async_finish()
+        await super().async_will_remove_from_hass()
+
+    @callback
+    def _schedule(
+        self,
+        stop: asyncio.Event,
+        minutes: int,
+        action: Callable[[asyncio.Event], Coroutine[Any, Any, None]],
+    ) -> None:
+        """Run the next phase transition of a run after the given number of minutes."""
+
+        async def _async_fire(_now: datetime) -> None:
+            if stop.is_set():
+                return
+            self._unsub_timer = None
+            await action(stop)
+
+        self._unsub_timer = async_call_later(self.hass, minutes * 60, _async_fire)
+
+    async def _async_start_cycle(self, stop: asyncio.Event) -> None:
+        """Queue for a valve slot, or finish if no (more) water is needed."""
+        # 1. Check if water is needed
+        if not self._check_if_water_needed():
+            _LOGGER.info(f"Smart Watering {self._zone_name}: Grond is vochtig genoeg. Stoppen.")
+            await self._async_finish(stop)
+            return
+
+        # Andere zones kunnen de kleppen bezet houden; wachten tot er een vrij is
+        self._phase = WateringPhase.WAITING
+        self.async_write_ha_state()
+        self._release_valve = async_get_valve_scheduler(self.hass).async_request(
+            self._zone_name, partial(self._async_valve_granted, stop)
+        )
+
+    @callback
+    def _async_valve_granted(self, stop: asyncio.Event) -> None:
+        """Start the cycle now that this zone may open its valve."""
+        if stop.is_set():
+            # _async_finish van deze run heeft het slot al teruggegeven
+            return
+        self.hass.async_create_task(self._async_water(stop))
+
+    @callback
+    def _async_release_valve(self) -> None:
+        """Give the valve slot back to the scheduler, or leave its queue."""
+        if self._release_valve is not None:
+            self._release_valve()
+            self._release_valve = None
+
+    async def _async_water(self, stop: asyncio.Event) -> None:
+        """Open the valve for one cycle."""
+        if stop.is_set():
+            return
+        self._cycle += 1
+        _LOGGER.info(f"Smart Watering {self._zone_name}: Start cyclus {self._cycle}/{self._max_cycles}")
+        self._phase = WateringPhase.WATERING
         self.async_write_ha_state()
 
-    async def _run_watering_cycle(self):
-        """The logic loop for cycle & soak."""
+        # 2. Sproeien
         try:
-            for cycle in range(1, self._max_cycles + 1):
-                if not self._is_active:
-                    break
+            await self._control_sprinkler(True)
+        except Exception:
+            _LOGGER.exception(f"Smart Watering {self._zone_name}: Kon sproeier niet aanzetten.")
+            await self._async_finish(stop)
+            return
+        # Tijdens het aanzetten uitgezet? _async_finish zette de sproeier uit vóór ons
+        # aan-commando klaar was, dus nog een keer uit; tenzij een nieuwe run al sproeit
+        if stop.is_set():
+            if stop is self._stop_event or self._phase is not WateringPhase.WATERING:
+                await self._control_sprinkler(False)
+            return
+        self._watered = True
+        self._metrics.async_count_cycle(self._zone_name)
+        self._schedule(stop, self._cycle_minutes, self._async_end_cycle)
+        self._async_watch_moisture(stop)
 
-                # 1. Check if water is needed
-                if not self._check_if_water_needed():
-                    _LOGGER.info(f"Smart Watering {self._zone_name}: Grond is vochtig genoeg. Stoppen.")
-                    break
+    @callback
+    def _async_watch_moisture(self, stop: asyncio.Event) -> None:
+        """Follow the soil sensors while the sprinkler of this run is on."""
+        sensors = [
+            plant.soil_entity
+            for plant in self.coordinator.plants
+            if plant.auto_water and plant.soil_entity
+        ]
+        if sensors:
+            self._unsub_moisture = async_track_state_change_event(
+                self.hass, sensors, partial(self._async_moisture_changed, stop)
+            )
 
-                _LOGGER.info(f"Smart Watering {self._zone_name}: Start cyclus {cycle}/{self._max_cycles}")
+    @callback
+    def _async_unwatch_moisture(self) -> None:
+        """Stop following the soil sensors."""
+        if self._unsub_moisture is not None:
+            self._unsub_moisture()
+            self._unsub_moisture = None
 
-                # 2. Sproeien
-                await self._control_sprinkler(True)
-                # Wacht sproeitijd (in seconden)
-                for _ in range(self._cycle_minutes * 60):
-                    if not self._is_active: break
-                    await asyncio.sleep(1)
+    @callback
+    def _async_moisture_changed(self, stop: asyncio.Event, event: Event) -> None:
+        """Stop the run as soon as all auto-watered plants are wet enough."""
+        # Een late melding van een beëindigde run mag een nieuwe run niet stoppen
+        if stop.is_set() or self._phase is not WateringPhase.WATERING or not self._is_soil_saturated():
+            return
+        _LOGGER.info(f"Smart Watering {self._zone_name}: Grond is verzadigd tijdens cyclus {self._cycle}. Stoppen.")
+        self._async_unwatch_moisture()
+        self.hass.async_create_task(self._async_finish(stop))
 
-                # 3. Stoppen en weken
-                await self._control_sprinkler(False)
-                
-                if cycle < self._max_cycles and self._is_active:
-                    _LOGGER.info(f"Smart Watering {self._zone_name}: Weken voor {self._soak_minutes} minuten.")
-                    # Wacht weektijd (in seconden)
-                    for _ in range(self._soak_minutes * 60):
-                        if not self._is_active: 
-                            break
-                        await asyncio.sleep(1)
-
-        except asyncio.CancelledError:
-            _LOGGER.info(f"Smart Watering {self._zone_name}: Geannuleerd.")
-        finally:
-            self._is_active = False
+    async def _async_end_cycle(self, stop: asyncio.Event) -> None:
+        """Stop the sprinkler and soak, or finish after the last cycle."""
+        # 3. Stoppen en weken
+        self._async_unwatch_moisture()
+        await self._control_sprinkler(False)
+        if stop.is_set():
+            # _async_finish heeft het slot van deze run al vrijgegeven
+            return
+        # Tijdens het weken mag een andere zone de klep gebruiken
+        self._async_release_valve()
+        if self._cycle >= self._max_cycles:
+            await self._async_finish(stop)
+            return
+
+        _LOGGER.info(f"Smart Watering {self._zone_name}: Weken voor {self._soak_minutes} minuten.")
+        self._phase = WateringPhase.SOAKING
+        self.async_write_ha_state()
+        self._schedule(stop, self._soak_minutes, self._async_start_cycle)
+
+    async def _async_finish(self, stop: asyncio.Event | None = None) -> None:
+        """Stop a run (by default the current one): cancel the pending phase, turn the sprinkler off."""
+        if stop is None:
+            stop = self._stop_event
+        elif stop is not self._stop_event:
+            # Een oude run; de huidige is niet van hem
+            return
+        stop.set()
+        self._async_unwatch_moisture()
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+        self._phase = WateringPhase.IDLE
+        if self._watered:
+            self._watered = False
+            self.coordinator.runtime_state.async_set_last_watered(
+                (plant.name for plant in self.coordinator.plants if plant.auto_water),
+                dt_util.now(),
+            )
+        self.async_write_ha_state()
+        try:
             await self._control_sprinkler(False)
-            self.async_write_ha_state()
+        finally:
+            # Pas vrijgeven als onze klep dicht is
+            self._async_release_valve()
 
     def _check_if_water_needed(self) -> bool:
         """Check soil sensors. Returns True if ANY plant is too dry."""
-        plants = self.coordinator.config_entry.options.get(CONF_PLANTS, [])
         needs_water = False
         
         has_sensors = False
-        for plant in plants:
+        for plant in self.coordinator.plants:
             # Als plant niet op automatische sproeier zit, negeren we hem voor de switch
-            if not plant.get(CONF_AUTO_WATER, True):
+            if not plant.auto_water:
                 continue
 
-            sensor = plant.get(CONF_SOIL_MOISTURE_ENTITY)
-            threshold = plant.get(CONF_MIN_MOISTURE, SOIL_MOISTURE_THRESHOLD)
+            sensor = plant.soil_entity
+            threshold = plant.min_moisture
             
             if sensor:
                 has_sensors = True
@@ -153,7 +319,7 @@ class FloraPlannerSmartWateringSwitch(CoordinatorEntity, SwitchEntity):
                     try:
                         val = float(state.state)
                         if val < threshold:
-                            _LOGGER.debug(f"Plant {plant['plant_name']} is te droog ({val}% < {threshold}%).")
+                            _LOGGER.debug(f"Plant {plant.name} is te droog ({val}% < {threshold}%).")
                             needs_water = True
                     except ValueError:
                         pass
@@ -164,6 +330,24 @@ class FloraPlannerSmartWateringSwitch(CoordinatorEntity, SwitchEntity):
             
         return needs_water
 
+    def _is_soil_saturated(self) -> bool:
+        """Return True if every auto-watered plant with a sensor is above its minimum plus hysteresis."""
+        has_sensors = False
+        for plant in self.coordinator.plants:
+            if not plant.auto_water or not plant.soil_entity:
+                continue
+            has_sensors = True
+            state = self.hass.states.get(plant.soil_entity)
+            if state is None or state.state in ["unknown", "unavailable"]:
+                # Onbekend telt niet als nat genoeg
+                return False
+            try:
+                if float(state.state) < plant.min_moisture + self._hysteresis:
+                    return False
+            except ValueError:
+                return False
+        return has_sensors
+
     async def _control_sprinkler(self, turn_on: bool):
         """Turn the real sprinkler entity on or off."""
         service = SERVICE_TURN_ON if turn_on else SERVICE_TURN_OFF
@@ -173,4 +357,10 @@ class FloraPlannerSmartWateringSwitch(CoordinatorEntity, SwitchEntity):
                 service,
                 {ATTR_ENTITY_ID: self._sprinkler_entity},
                 blocking=True
-            )
\ No newline at end of file
+            )
+        if turn_on:
+            if self._valve_opened is None:
+                self._valve_opened = time.monotonic()
+        elif self._valve_opened is not None:
+            self._metrics.async_add_valve_open(self._zone_name, time.monotonic() - self._valve_opened)
+            self._valve_opened = None
\ No newline at end of file
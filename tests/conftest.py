@@ -0,0 +1,30 @@
+"""Load the repository root as the flora_planner package."""
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+import sys
+from types import ModuleType
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "flora_planner"
+
+
+def _load_package() -> None:
+    """Import the integration; without Home Assistant only its plain modules are importable."""
+    if importlib.util.find_spec("homeassistant") is None:
+        # Een leeg package, zodat schedule.py en batch.py toch te importeren zijn
+        package = ModuleType(PACKAGE)
+        package.__path__ = [str(ROOT)]
+        sys.modules[PACKAGE] = package
+        return
+
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE, ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
+
+
+_load_package()
@@ -0,0 +1,134 @@
+"""The batched evaluation must give exactly the results of the per-plant loops."""
+from __future__ import annotations
+
+import asyncio
+from datetime import date, timedelta
+import importlib
+import random
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+const = importlib.import_module("flora_planner.const")
+batch = importlib.import_module("flora_planner.batch")
+schedule = importlib.import_module("flora_planner.schedule")
+
+TODAY = date(2026, 3, 1)
+TRIALS = 40
+
+
+@pytest.fixture(params=["numpy", "array"])
+def array_path(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Run a test on the NumPy path and on the array-module fallback."""
+    if request.param == "numpy":
+        if batch.np is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(batch, "np", None)
+    return request.param
+
+
+def random_zone(rng: random.Random, size: int) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    """Return the plant options of a random zone and the states of its soil sensors."""
+    plants = []
+    states = {}
+    for index in range(size):
+        plant = {
+            const.CONF_PLANT_NAME: f"Plant {index}",
+            const.CONF_ANCHOR_DATE: (TODAY + timedelta(days=rng.randint(-400, 20))).isoformat(),
+            # 0 is een ongeldig interval: geen taken, op elk pad
+            const.CONF_WATER_INTERVAL: rng.randint(0, 14),
+            const.CONF_FEED_INTERVAL: rng.randint(0, 60),
+            const.CONF_WATER_START_MONTH: rng.randint(1, 12),
+            const.CONF_WATER_END_MONTH: rng.randint(1, 12),
+            const.CONF_FEED_START_MONTH: rng.randint(1, 12),
+            const.CONF_FEED_END_MONTH: rng.randint(1, 12),
+            const.CONF_PRUNE_MONTH: rng.randint(0, 12),
+            const.CONF_SOW_MONTH: rng.randint(0, 12),
+            const.CONF_HARVEST_MONTH: rng.randint(0, 12),
+        }
+        if index % 3 == 0:
+            entity_id = f"sensor.soil_{index}"
+            plant[const.CONF_SOIL_MOISTURE_ENTITY] = entity_id
+            states[entity_id] = SimpleNamespace(state=rng.choice(["10", "19.9", "20", "45", "unknown", "nat"]))
+        plants.append(plant)
+    return plants, states
+
+
+def test_iter_tasks_matches_schedule(array_path: str) -> None:
+    """PlantBatch.iter_tasks yields the same tasks as schedule.iter_tasks."""
+    rng = random.Random(21)
+    for _ in range(TRIALS):
+        plants = schedule.compile_plants(random_zone(rng, rng.randint(1, 60))[0])
+        start = TODAY + timedelta(days=rng.randint(-30, 400))
+        end = start + timedelta(days=rng.randint(0, 90))
+        days = [
+            (day.toordinal(), day.month, day.day)
+            for day in (start + timedelta(days=offset) for offset in range((end - start).days + 1))
+        ]
+
+        plant_batch = batch.PlantBatch(plants)
+        batched = sorted(
+            (ordinal, kind, plant_batch.names[index]) for ordinal, kind, index in plant_batch.iter_tasks(days)
+        )
+        expected = sorted(
+            (task.day.toordinal(), task.kind, task.plant) for task in schedule.iter_tasks(plants, start, end)
+        )
+        assert batched == expected
+
+
+def make_coordinator(plants: list[dict[str, Any]], states: dict[str, Any]) -> Any:
+    """Set up a coordinator for a zone on a minimal stand-in for hass."""
+    integration = importlib.import_module("flora_planner")
+    config_entries = importlib.import_module("homeassistant.config_entries")
+
+    hass = SimpleNamespace(
+        loop=asyncio.get_running_loop(),
+        bus=SimpleNamespace(async_listen_once=lambda event_type, listener: lambda: None),
+        states=SimpleNamespace(get=states.get),
+        config=SimpleNamespace(language="nl"),
+        data={},
+    )
+    entry = SimpleNamespace(
+        entry_id="test",
+        title="Test",
+        domain=const.DOMAIN,
+        data={const.CONF_ZONE_NAME: "Test", const.CONF_WEATHER_ENTITY: "weather.home"},
+        options={const.CONF_PLANTS: plants},
+        async_on_unload=lambda func: None,
+    )
+    if (current_entry := getattr(config_entries, "current_entry", None)) is not None:
+        current_entry.set(entry)
+
+    anchors: dict[str, str] = {}
+    runtime_state = SimpleNamespace(
+        anchors=anchors,
+        last_watered={},
+        async_set_anchor=lambda plant_name, day: anchors.__setitem__(plant_name, day.isoformat()),
+    )
+    return integration.FloraPlannerCoordinator(hass, entry, None, runtime_state)
+
+
+def test_evaluate_plants_batched_matches_loop(array_path: str) -> None:
+    """_evaluate_plants_batched gives the results and anchor moves of _evaluate_plants."""
+    pytest.importorskip("homeassistant")
+
+    async def compare() -> None:
+        rng = random.Random(12)
+        for _ in range(TRIALS):
+            plants, states = random_zone(rng, rng.randint(1, 200))
+            today = TODAY + timedelta(days=rng.randint(0, 400))
+            temperature = rng.choice([None, 2.0, 15.0, 30.0])
+            precipitation = rng.choice([None, 0.0, 10.0])
+
+            loop_zone = make_coordinator(plants, states)
+            batch_zone = make_coordinator(plants, states)
+            assert batch_zone._evaluate_plants_batched(today, temperature, precipitation) == (
+                loop_zone._evaluate_plants(today, temperature, precipitation)
+            )
+            assert batch_zone.runtime_state.anchors == loop_zone.runtime_state.anchors
+            assert [plant.anchor for plant in batch_zone.plants] == [plant.anchor for plant in loop_zone.plants]
+            assert batch_zone.schedule_version == loop_zone.schedule_version
+
+    asyncio.run(compare())
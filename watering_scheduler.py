@@ -0,0 +1,111 @@
+"""Valve scheduler shared by the smart watering switches of all zones."""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import DATA_VALVE_SCHEDULER, DEFAULT_MAX_CONCURRENT_VALVES, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _ValveRequest:
+    """A zone waiting for, or holding, a valve slot."""
+
+    __slots__ = ("zone_name", "on_granted")
+
+    def __init__(self, zone_name: str, on_granted: Callable[[], None]) -> None:
+        """Initialize the request."""
+        self.zone_name = zone_name
+        self.on_granted = on_granted
+
+
+class ValveScheduler:
+    """Hands out a limited number of valve slots to the zones, first come first served.
+
+    A zone only holds a slot while its sprinkler is actually on. During the
+    soak period it gives the slot back, so another zone can run its cycle in
+    the meantime instead of leaving the pump idle. Every zone with a sprinkler
+    sets its own limit; the strictest one applies.
+    """
+
+    def __init__(self, max_valves: int = DEFAULT_MAX_CONCURRENT_VALVES) -> None:
+        """Initialize the scheduler."""
+        self.max_valves = max_valves
+        self._default_max_valves = max_valves
+        self._limits: dict[str, int] = {}
+        self._queue: deque[_ValveRequest] = deque()
+        self._active: list[_ValveRequest] = []
+
+    @property
+    def active_zones(self) -> list[str]:
+        """Return the zones that currently hold a slot."""
+        return [request.zone_name for request in self._active]
+
+    @property
+    def waiting_zones(self) -> list[str]:
+        """Return the zones waiting for a slot, in queue order."""
+        return [request.zone_name for request in self._queue]
+
+    @callback
+    def async_set_limit(self, entry_id: str, max_valves: int) -> CALLBACK_TYPE:
+        """Apply the limit of an entry; returns the callback that withdraws it."""
+        self._limits[entry_id] = max_valves
+        self._async_apply_limits()
+
+        @callback
+        def remove() -> None:
+            if self._limits.pop(entry_id, None) is not None:
+                self._async_apply_limits()
+
+        return remove
+
+    @callback
+    def _async_apply_limits(self) -> None:
+        """Use the strictest limit; open valves stay open until they are released."""
+        self.max_valves = min(self._limits.values(), default=self._default_max_valves)
+        # Een ruimere limiet kan meteen wachtende zones vrijgeven
+        self._async_dispatch()
+
+    @callback
+    def async_request(self, zone_name: str, on_granted: Callable[[], None]) -> CALLBACK_TYPE:
+        """Queue a zone for a valve slot.
+
+        on_granted is called (possibly right away) once the zone may open its
+        valve. The returned callback gives the slot back, or leaves the queue
+        if the slot was not granted yet; calling it twice is harmless.
+        """
+        request = _ValveRequest(zone_name, on_granted)
+        self._queue.append(request)
+        self._async_dispatch()
+
+        @callback
+        def release() -> None:
+            if request in self._active:
+                self._active.remove(request)
+                self._async_dispatch()
+            elif request in self._queue:
+                self._queue.remove(request)
+
+        return release
+
+    @callback
+    def _async_dispatch(self) -> None:
+        """Grant free slots to the zones at the front of the queue."""
+        while self._queue and len(self._active) < self.max_valves:
+            request = self._queue.popleft()
+            self._active.append(request)
+            _LOGGER.debug(f"Klep vrijgegeven voor {request.zone_name} ({len(self._active)}/{self.max_valves})")
+            request.on_granted()
+
+
+@callback
+def async_get_valve_scheduler(hass: HomeAssistant) -> ValveScheduler:
+    """Return the valve scheduler shared by all zones."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (scheduler := domain_data.get(DATA_VALVE_SCHEDULER)) is None:
+        scheduler = domain_data[DATA_VALVE_SCHEDULER] = ValveScheduler()
+    return scheduler
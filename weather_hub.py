@@ -0,0 +1,115 @@
+"""Shared weather data for all zones using the same weather entity."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import logging
+from typing import Any
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import DATA_WEATHER_HUBS, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class WeatherSnapshot:
+    """Parsed weather state of one weather entity."""
+
+    temperature: float | None
+    precipitation: float | None
+
+
+def _as_float(value: Any) -> float | None:
+    """Convert an attribute to float, None if that's not possible."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class WeatherHub:
+    """Reads the weather of one entity once and fans it out to every zone.
+
+    The state is parsed once and cached until the weather entity changes
+    state, so N zones on the same entity cost one read instead of N.
+    Forecasts are not requested: the evaluation only uses the current
+    temperature and precipitation.
+    """
+
+    def __init__(self, hass: HomeAssistant, entity_id: str) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        self.entity_id = entity_id
+        self._listeners: list[Callable[[WeatherSnapshot], None]] = []
+        self._unsub_state: Callable[[], None] | None = None
+        self._snapshot: WeatherSnapshot | None = None
+
+    async def async_get_snapshot(self) -> WeatherSnapshot | None:
+        """Return the current weather, reading it if it isn't cached."""
+        if self._snapshot is not None:
+            return self._snapshot
+        snapshot = self._read_weather()
+        if self._unsub_state is not None:
+            # Alleen cachen als we de entiteit volgen, anders merken we wijzigingen niet op
+            self._snapshot = snapshot
+        return snapshot
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[WeatherSnapshot], None]) -> Callable[[], None]:
+        """Call update_callback with every new snapshot."""
+        self._listeners.append(update_callback)
+        if self._unsub_state is None:
+            self._unsub_state = async_track_state_change_event(
+                self.hass, [self.entity_id], self._async_state_changed
+            )
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+            if not self._listeners:
+                self._async_close()
+
+        return remove_listener
+
+    @callback
+    def _async_close(self) -> None:
+        """Stop tracking the weather entity once no zone uses it anymore."""
+        if self._unsub_state is not None:
+            self._unsub_state()
+            self._unsub_state = None
+        self._snapshot = None
+        hubs: dict[str, WeatherHub] = self.hass.data.get(DOMAIN, {}).get(DATA_WEATHER_HUBS, {})
+        if hubs.get(self.entity_id) is self:
+            del hubs[self.entity_id]
+
+    @callback
+    def _async_state_changed(self, event: Event) -> None:
+        """Read the new weather and pass it to every zone."""
+        self._snapshot = self._read_weather()
+        if self._snapshot is not None:
+            for update_callback in list(self._listeners):
+                update_callback(self._snapshot)
+
+    def _read_weather(self) -> WeatherSnapshot | None:
+        """Read the weather entity."""
+        state = self.hass.states.get(self.entity_id)
+        if state is None:
+            return None
+
+        return WeatherSnapshot(
+            temperature=_as_float(state.attributes.get("temperature")),
+            # Geen actuele neerslag blijft None: een uurvoorspelling is geen meting
+            precipitation=_as_float(state.attributes.get("precipitation")),
+        )
+
+
+@callback
+def async_get_weather_hub(hass: HomeAssistant, entity_id: str) -> WeatherHub:
+    """Return the hub for a weather entity, shared by all zones."""
+    hubs: dict[str, WeatherHub] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_WEATHER_HUBS, {})
+    if (hub := hubs.get(entity_id)) is None:
+        hub = hubs[entity_id] = WeatherHub(hass, entity_id)
+    return hub